@@ -6,10 +6,12 @@ def write_generator_file(generatordata):
     lines = ["Setup for complex_generator.py:\n",
              "\n",
              "Dictates the values of the voltage source. \n",
-             "There are 2 modes var and const:\n",
+             "There are 3 modes var, const and file:\n",
              "    const: 1 constant voltage given after comma.\n",
              "    var: A variable piecewise linear function. Takes time voltage pairs separated by a space. \n",
              "         The voltage output is interpolated between pairs.\n",
+             "    file: A piecewise linear function read from a file of time voltage pairs, one pair per line.\n",
+             "          Used for long waveforms. The file is referenced by the schematic rather than copied into it.\n",
              "Examples\n",
              "    const, 262.5k  ---  Constant value of 262.5kV \n",
              "    var, 0 0 1 400k 14400 400k 14401 0  ---  Voltage starts at 0V and rises to 400kV over 1 second.\n",
@@ -28,7 +30,15 @@ def write_generator_file(generatordata):
              "\n",
              "The number of consecutive points that can be combined in the export file. Larger numbers result in a \n",
              "smaller export file. Defaults to 16 if left out.\n",
-             "compression = 1"]
+             "compression = 1\n",
+             "\n",
+             "Optional time step schedule, fixed or graded. fixed steps at the time step throughout. graded restarts at the time step\n",
+             "after every voltage or resistance breakpoint and grows it by the step growth factor up to the maximum time step.\n",
+             "The maximum time step defaults to a fiftieth of the simulation and the step growth to 2.\n",
+             "Only used by the native solver, LTSpice schematics and netlists always use the time step above.\n",
+             "time step schedule = {}\n",
+             "maximum time step = {}\n",
+             "step growth = {}"]
     with open("generator_config.txt", "w") as output:
         for line in lines:
             if line.split("=")[0] == "voltage ":
@@ -48,6 +58,15 @@ def write_generator_file(generatordata):
             
             elif line.split("=")[0] == "compression ":
                 line = line.format(generatordata["compression"])
+
+            elif line.split("=")[0] == "time step schedule ":
+                line = line.format(generatordata["schedule"])
+
+            elif line.split("=")[0] == "maximum time step ":
+                line = line.format(generatordata["maximum time step"])
+
+            elif line.split("=")[0] == "step growth ":
+                line = line.format(generatordata["step growth"])
                 
             
             output.write(line)
@@ -66,9 +85,16 @@ def write_iteration_file(iterationdata):
              "Format of the output files where {} is the number of the iteration\n",
              "output file name format = {}\n",
              "\n",
-             "Number of times that the program is rerun\n",
+             "Maximum number of times that the program is rerun\n",
              "number of iterations = {}\n",
              "\n",
+             "Iterations stop early once the largest change in field between iterations is less than this fraction of the largest field\n",
+             "convergence tolerance = {}\n",
+             "\n",
+             "Starts each iteration at the time start of the generator setup from the state the previous iteration reached there and reuses its time steps. Warm start only saves time when the time start is after 0\n",
+             "warm start = {}\n",
+             "reuse time grid = {}\n",
+             "\n",
              "Data for the radii of the layers in the form: start, stop, difference\n",
              "radius data = {}\n",
              "\n",
@@ -96,6 +122,15 @@ def write_iteration_file(iterationdata):
             elif line.split("=")[0] == "number of iterations ":
                 line = line.format(iterationdata["iterations"])
 
+            elif line.split("=")[0] == "convergence tolerance ":
+                line = line.format(iterationdata["tolerance"])
+
+            elif line.split("=")[0] == "warm start ":
+                line = line.format(iterationdata["warmStart"])
+
+            elif line.split("=")[0] == "reuse time grid ":
+                line = line.format(iterationdata["reuseGrid"])
+
             elif line.split("=")[0] == "radius data ":
                 line = line.format(iterationdata["radius"])
 
@@ -1,29 +1,42 @@
 import csv
+import os
+import numpy as np
+from series_store import load_series
+from raw_reader import RawReader
 
 class GraphGetter:
 
+    # Decimated traces shared between instances, keyed by file, modification time, width and time range
+    _decimated = {}
+    _cacheSize = 32
+
     def __init__(self, file, compression=1):
+        self.file = file
         self.xCoord = []
         self.yCoord = []
     
-        if file != "":
+        # Converted files are memory mapped and each trace is a view of one column
+        if file[-4:] == ".npy":
+            header, table = load_series(file)
+            self.xCoord = table[:, 0]
+            self.yCoord = [table[:, x] for x in range(1, table.shape[1])]
+
+        # Simulator output is memory mapped and traces are only read when plotted
+        elif file[-4:] == ".raw":
+            raw = RawReader(file)
+            self.xCoord = raw.time
+            self.yCoord = [raw.trace(x) for x in range(1, len(raw.names))]
+
+        # Text results are parsed into arrays so time ranges and decimation work the same as for other files
+        elif file != "":
             with open(file, "r") as infile:
-                dialect = csv.Sniffer().sniff(infile.read(5000))
-                infile.seek(0)
-                reader = csv.reader(infile, dialect)
-                length = 0
-                
-                for line in reader:
-                    line = [x for x in line]
-                    if length == 0:
-                        length = len(line) - 1
-                        self.yCoord = [[] for x in range(length)]
-
-                    for index, value in enumerate(line):
-                        if index == 0:
-                            self.xCoord.append(value)
-                        else:
-                            self.yCoord[index - 1].append(value)
+                sample = infile.read(5000)
+            delimiter = csv.Sniffer().sniff(sample).delimiter
+
+            table = np.loadtxt(file, delimiter=None if delimiter.isspace() else delimiter,
+                               skiprows=header_lines(sample, delimiter), ndmin=2)
+            self.xCoord = table[:, 0]
+            self.yCoord = [table[:, x] for x in range(1, table.shape[1])]
 
 
     def __len__(self):
@@ -32,12 +45,77 @@ class GraphGetter:
     def __repr__(self):
         return "GraphGetter(file)"
 
-    def get_plots(self):
+    def get_plots(self, start=None, stop=None, width=None):
 
-        if self.xCoord == [] or self.yCoord == []:
+        if len(self.xCoord) == 0 or len(self.yCoord) == 0:
             return (0, 1), (0, 1)
 
-        for coords in self.yCoord:
-            yield self.xCoord, coords
+        select = slice(None if start is None else int(np.searchsorted(self.xCoord, start, side="left")),
+                       None if stop is None else int(np.searchsorted(self.xCoord, stop, side="right")))
+
+        if width is None:
+            for coords in self.yCoord:
+                yield self.xCoord[select], coords[select]
+            return
+
+        key = (self.file, os.path.getmtime(self.file), width, start, stop)
+        if key not in GraphGetter._decimated:
+            # Forgets the oldest entry once the cache is full
+            if len(GraphGetter._decimated) >= GraphGetter._cacheSize:
+                del GraphGetter._decimated[next(iter(GraphGetter._decimated))]
+
+            GraphGetter._decimated[key] = [decimate(self.xCoord[select], coords[select], width)
+                                           for coords in self.yCoord]
+
+        for plot in GraphGetter._decimated[key]:
+            yield plot
+
+
+def header_lines(sample, delimiter):
+
+    """
+    Counts the lines at the start of a text result which are not numbers e.g. time V(n001) V(n002)
+    """
+
+    for index, line in enumerate(sample.splitlines()):
+        fields = line.split(None if delimiter.isspace() else delimiter)
+        try:
+            float(fields[0])
+            return index
+        except (ValueError, IndexError):
+            pass
+
+    return 0
+
+
+def decimate(x, y, width):
+
+    """
+    Reduces a trace to at most two points per pixel while keeping its visual envelope.
+    The trace is split into one bucket per pixel and the minimum and maximum of each bucket are kept in the
+    order they occur.
+
+    Args:
+        x, y - arrays holding the trace
+        width - width of the plot in pixels
+
+    Returns a tuple of arrays (x, y)
+    """
+
+    length = len(y)
+    if length <= 2 * width:
+        return np.asarray(x), np.asarray(y)
+
+    # Pads the trace with its last value so it splits evenly into buckets
+    size = -(-length // width)
+    buckets = np.pad(np.asarray(y), (0, size * width - length), mode="edge").reshape(width, size)
+
+    # Positions of the minimum and maximum of each bucket in the original trace
+    offsets = np.arange(width) * size
+    low = np.minimum(offsets + buckets.argmin(axis=1), length - 1)
+    high = np.minimum(offsets + buckets.argmax(axis=1), length - 1)
+    index = np.column_stack((np.minimum(low, high), np.maximum(low, high))).ravel()
+
+    return np.asarray(x)[index], np.asarray(y)[index]
 
 
@@ -0,0 +1,263 @@
+import queue
+import threading
+import traceback
+import tkinter as tk
+from tkinter.messagebox import showerror
+from concurrent.futures import ThreadPoolExecutor
+import complex_generator
+import iteration
+
+
+# Work such as generating a schematic or running the iterations is handed to a background thread so the window
+# keeps responding. Jobs wait in a queue and run one at a time so the next design can be set up while the current
+# one runs. Worker threads never touch Tk, they put messages on a thread safe queue which the window reads with
+# after().
+#
+# Progress is reported through the same stage hooks used for profiling, see profiler.py. Cancelling a running job
+# stops it at the start of its next stage.
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+
+    def __init__(self, number, name, function, messages):
+        self.number = number
+        self.name = name
+        self.function = function
+        self.state = "queued"
+        self.result = None
+        self.error = None
+        self.future = None
+        self._messages = messages
+        self._cancel = threading.Event()
+        self._calls = {}
+
+
+    def __repr__(self):
+        return "Job({}, {}, {})".format(self.number, self.name, self.state)
+
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+
+    def cancel(self):
+
+        """
+        Asks the job to stop. Queued jobs never start and running jobs stop at their next stage.
+        """
+
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self._messages.put((self, "cancelled", None))
+
+
+    def report(self, message):
+        self._messages.put((self, "progress", message))
+
+
+    # Profiler interface so the job can be passed wherever a profiler is taken
+
+    enabled = True
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def stage(self, name):
+        if self.cancelled:
+            raise JobCancelled()
+
+        self._calls[name] = self._calls.get(name, 0) + 1
+        self.report("{} ({})".format(name, self._calls[name]))
+
+        return _JOB_STAGE
+
+    def add_bytes(self, name, count):
+        pass
+
+
+    def iteration_progress(self, entry, maxIterations):
+
+        """
+        Progress callback for run_iterations()
+        """
+
+        self.report("iteration {} of {}: field change {:.3e}".format(entry["iteration"], maxIterations,
+                                                                      entry["field change"]))
+        if self.cancelled:
+            raise JobCancelled()
+
+
+    def _run(self):
+        if self.cancelled:
+            self._messages.put((self, "cancelled", None))
+            return
+
+        self._messages.put((self, "running", None))
+        try:
+            result = self.function(self)
+            self._messages.put((self, "done", result))
+
+        except JobCancelled:
+            self._messages.put((self, "cancelled", None))
+
+        except Exception as e:
+            self._messages.put((self, "failed", "{}\n{}".format(e, traceback.format_exc())))
+
+
+class _JobStage:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_JOB_STAGE = _JobStage()
+
+
+class JobQueue:
+
+    def __init__(self, root, workers=1, interval=100):
+        self.root = root
+        self.interval = interval
+        self.jobs = []
+        self.listeners = []
+        self._messages = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+
+        self.root.after(self.interval, self._poll)
+
+
+    def __repr__(self):
+        return "JobQueue({} jobs)".format(len(self.jobs))
+
+
+    def submit(self, name, function):
+
+        """
+        Queues a job
+
+        Args:
+            name - shown to the user
+            function - called on a worker thread with the Job. Can pass the job as a profiler or progress callback
+                       to report progress and be cancelled
+
+        Returns the Job
+        """
+
+        job = Job(len(self.jobs) + 1, name, function, self._messages)
+        self.jobs.append(job)
+        job.future = self._pool.submit(job._run)
+        self._notify(job, "queued", None)
+
+        return job
+
+
+    def submit_generation(self, inpt_file, outpt_file, setup_file="config/generator_config.txt", **kwargs):
+
+        """
+        Queues a schematic generation, see generate_schematic() in complex_generator.py
+        """
+
+        if inpt_file[-4:] not in (".csv", ".npy") or outpt_file[-4:] not in (".asc", ".cir") or setup_file[-4:] != ".txt":
+            raise ValueError("Incorrect File types")
+
+        return self.submit("Generate " + outpt_file,
+                           lambda job: complex_generator.main(inpt_file, outpt_file, setup_file, profiler=job, **kwargs))
+
+
+    def submit_iterations(self, config_file="config/iteration_config.txt", setup_file="config/generator_config.txt",
+                          **kwargs):
+
+        """
+        Queues the iteration loop, see run_iterations() in iteration.py
+        """
+
+        return self.submit("Iterate " + config_file,
+                           lambda job: iteration.run_iterations(config_file, setup_file, progress=job.iteration_progress,
+                                                                profiler=job, **kwargs))
+
+
+    def cancel_all(self):
+        for job in self.jobs:
+            if job.state in ("queued", "running"):
+                job.cancel()
+
+
+    def shutdown(self):
+        self.cancel_all()
+        self._pool.shutdown(wait=False)
+
+
+    def _poll(self):
+
+        """
+        Passes every waiting message to the listeners on the Tk thread then checks again later
+        """
+
+        while True:
+            try:
+                job, kind, payload = self._messages.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == "done":
+                job.result = payload
+            elif kind == "failed":
+                job.error = payload
+
+            if kind != "progress":
+                job.state = kind
+            self._notify(job, kind, payload)
+
+        self.root.after(self.interval, self._poll)
+
+
+    def _notify(self, job, kind, payload):
+        for listener in self.listeners:
+            listener(job, kind, payload)
+
+
+class JobPanel(tk.Frame):
+
+    def __init__(self, parent, jobQueue, *args, **kwargs):
+        tk.Frame.__init__(self, parent, *args, **kwargs)
+
+        self.jobQueue = jobQueue
+        self.jobQueue.listeners.append(self.update_job)
+        self.status = {}
+
+        title = tk.Label(self, text="Jobs")
+        title.grid(row=0, column=0, sticky=tk.W)
+
+        self.jobList = tk.Listbox(self, width=70, height=6)
+        self.jobList.grid(row=1, column=0, columnspan=2, sticky=tk.NSEW)
+
+        cancelBtn = tk.Button(self, text="Cancel", padx=10, command=self._cancel)
+        cancelBtn.grid(row=2, column=1, sticky=tk.E, pady=5)
+
+
+    def update_job(self, job, kind, payload):
+        self.status[job.number] = "{} - {}".format(job.name, payload if kind == "progress" else kind)
+
+        self.jobList.delete(0, tk.END)
+        for number in sorted(self.status):
+            self.jobList.insert(tk.END, "{}. {}".format(number, self.status[number]))
+
+        # The error and traceback of a failed job are shown to the user, the error is also kept on job.error
+        if kind == "failed":
+            showerror("Job failed", "{}\n\n{}".format(job.name, payload), parent=self)
+
+
+    def _cancel(self):
+        for index in self.jobList.curselection():
+            self.jobQueue.jobs[index].cancel()
@@ -2,8 +2,9 @@ import tkinter as tk
 from tkinter.scrolledtext import ScrolledText
 from tkinter.filedialog import askopenfilename, askdirectory
 from GUI.tkintertable import TkTable
+from GUI.getgraph import GraphGetter
 import os
-import csv
+import numpy as np
 from decimal import Decimal as d
 
 
@@ -54,9 +55,29 @@ class GeneratorConfig(tk.Frame):
         compressionLbl.grid(row=18, column=0, sticky=tk.W, pady=5)
         compressionEntry.grid(row=18, column=1, sticky=tk.W, padx=20, pady=5)
 
+        self.schedule = tk.StringVar(self)
+        self.schedule.set("fixed")
+        scheduleLbl = tk.Label(self, text="Time step schedule: ")
+        scheduleOp = tk.OptionMenu(self, self.schedule, "fixed", "graded")
+        scheduleLbl.grid(row=19, column=0, sticky=tk.W, pady=5)
+        scheduleOp.grid(row=19, column=1, sticky=tk.W, padx=20, pady=5)
+
+        self.maxStep = tk.StringVar(self)
+        maxStepLbl = tk.Label(self, text="Maximum graded timestep: ")
+        maxStepEntry = tk.Entry(self, textvariable=self.maxStep)
+        maxStepLbl.grid(row=20, column=0, sticky=tk.W, pady=5)
+        maxStepEntry.grid(row=20, column=1, sticky=tk.W, padx=20, pady=5)
+
+        self.stepGrowth = tk.StringVar(self)
+        self.stepGrowth.set("2")
+        stepGrowthLbl = tk.Label(self, text="Step growth: ")
+        stepGrowthEntry = tk.Entry(self, textvariable=self.stepGrowth)
+        stepGrowthLbl.grid(row=21, column=0, sticky=tk.W, pady=5)
+        stepGrowthEntry.grid(row=21, column=1, sticky=tk.W, padx=20, pady=5)
+
 
     def _loadFile(self):
-        self.voltageFile.set(askopenfilename(initialdir=os.path.expanduser("~"), title="Select file", filetypes=(("CSV files", ("*.csv", "*.txt")), ("All files", "*.*"))))
+        self.voltageFile.set(askopenfilename(initialdir=os.path.expanduser("~"), title="Select file", filetypes=(("CSV files", ("*.csv", "*.txt")), ("NumPy files", "*.npy"), ("All files", "*.*"))))
 
 
     def swap_voltage_input(self, *args):
@@ -85,12 +106,9 @@ class GeneratorConfig(tk.Frame):
 
     def get_data(self):
 
+        # The waveform file is referenced by its path so long waveforms are never copied into the config
         if self.vType.get() == "File":
-            voltage = "var, {}"
-            with open(self.voltageFile.get(), "r") as file:
-                csvreader = csv.reader(file, "excel")
-                voltage = voltage.format(" ".join(["{} {}".format(*x) for x in csvreader]))
-                
+            voltage = "file, {}".format(self.voltageFile.get())
 
         elif self.vType.get() == "Constant":
             voltage = "const, {}".format(self.voltageTable.get_values()[0][0])
@@ -101,7 +119,10 @@ class GeneratorConfig(tk.Frame):
             "voltage":voltage,
             "parasitic resistance":self.pResistance.get(),
             "sim timings":self.timingTable.get_values(),
-            "compression":self.compression.get()
+            "compression":self.compression.get(),
+            "schedule":self.schedule.get(),
+            "maximum time step":self.maxStep.get(),
+            "step growth":self.stepGrowth.get()
         }
         return values
 
@@ -118,45 +139,44 @@ class GeneratorConfig(tk.Frame):
 
                     if v_type[0] == "const":
                         self.vType.set("Constant")
-                        self.voltageTable.table[0][1].value.set(v_type[1])
+                        self.voltageTable.set_value(0, 0, v_type[1])
                     elif v_type[0] == "var":
-                        points = v_type[1].strip(" ").split(" ")
-                        new_points = []
-                        for ind, p in enumerate(points):
-                            if ind % 2 == 0:
-                                new_points.append([p])
-                            else:
-                                new_points[-1].append(p)
-                        
-                        new_file = file.split("/")
-                        new_file[-1] = new_file[-1].replace("setup", "config")
-                        new_file = "/".join(new_file)
-                        new_file = new_file.replace("generator_config", "voltage_file")   
+                        points = v_type[1].split()
                         points = [(points[i], points[i + 1]) for i in range(0, len(points), 2)]
-                        with open(new_file, "w", newline="") as f:
-                            csvwriter = csv.writer(f, "excel")
-                            for line in points:
-                                csvwriter.writerow(line)
 
+                        # Setting the type resets the table so the points are added after
+                        self.vType.set("Variable")
+                        self.voltageTable.set_values(points, range(1, len(points) + 1))
+
+                    elif v_type[0] == "file":
                         self.vType.set("File")
-                        self.voltageFile.set(new_file)
-                        
+                        self.voltageFile.set(line[1].split(",", 1)[1].strip())
+
 
                 elif line[0] == "parasitic resistance":
                     self.pResistance.set(line[1])
                 
                 elif line[0] == "time start":
-                    self.timingTable.table[0][1].value.set(line[1])
+                    self.timingTable.set_value(0, 0, line[1])
 
                 elif line[0] == "time stop":
-                    self.timingTable.table[1][1].value.set(line[1])
+                    self.timingTable.set_value(1, 0, line[1])
                 
                 elif line[0] == "time step":
-                    self.timingTable.table[2][1].value.set(line[1])
+                    self.timingTable.set_value(2, 0, line[1])
 
                 elif line[0] == "compression":
                     self.compression.set(line[1])
 
+                elif line[0] == "time step schedule":
+                    self.schedule.set(line[1].lower())
+
+                elif line[0] == "maximum time step":
+                    self.maxStep.set(line[1])
+
+                elif line[0] == "step growth":
+                    self.stepGrowth.set(line[1])
+
 
 
 
@@ -200,11 +220,18 @@ class IteratorConfig(tk.Frame):
 
         self.iterationNumber = tk.StringVar(self)
         self.iterationNumber.set(5)
-        iterationLbl = tk.Label(self, text="Number of iterations: ")
+        iterationLbl = tk.Label(self, text="Maximum iterations: ")
         iterationSpin = tk.Spinbox(self, from_=1, to=20, textvariable=self.iterationNumber)
         iterationLbl.grid(row=6, column=0, sticky=tk.W, pady=5)
         iterationSpin.grid(row=6, column=1, sticky=tk.W, padx=20, pady=5)
 
+        self.tolerance = tk.StringVar(self)
+        self.tolerance.set("1e-3")
+        toleranceLbl = tk.Label(self, text="Convergence tolerance: ")
+        self.toleranceEntry = tk.Entry(self, textvariable=self.tolerance)
+        toleranceLbl.grid(row=6, column=2, sticky=tk.W, pady=5)
+        self.toleranceEntry.grid(row=6, column=3, sticky=tk.W, padx=20, pady=5)
+
         radiusLbl = tk.Label(self, text="Radius data: ")
         self.radiusTable = TkTable(self, padx=20, pady=5)
         self.radiusTable.append_row_data(2)
@@ -250,6 +277,15 @@ class IteratorConfig(tk.Frame):
         timesLbl.grid(row=17, column=0, sticky=tk.W, pady=5)
         self.timesEntry.grid(row=17, column=1, columnspan=2, sticky=tk.EW, padx=20, pady=5)
 
+        self.warmStart = tk.BooleanVar(self)
+        self.reuseGrid = tk.BooleanVar(self)
+        warmStartCheck = tk.Checkbutton(self, text="Warm start", variable=self.warmStart)
+        reuseGridCheck = tk.Checkbutton(self, text="Reuse time grid", variable=self.reuseGrid)
+        warmStartCheck.grid(row=18, column=0, sticky=tk.W, pady=5)
+        reuseGridCheck.grid(row=18, column=1, sticky=tk.W, padx=20, pady=5)
+        warmStartNote = tk.Label(self, text="Warm start only saves time when the generator time start is after 0")
+        warmStartNote.grid(row=19, column=0, columnspan=3, sticky=tk.W)
+
 
     def update_resistor_numbers(self, *args):
         
@@ -275,8 +311,8 @@ class IteratorConfig(tk.Frame):
         self.resistivityTable.add_row_headers(["Resistivity", "Temperature \nCoefficient of \nResistivity"])
 
         for i in range(self.resistivityTable.columns if self.resistivityTable.columns < len(self.pastAlpha) else len(self.pastAlpha)):
-            self.resistivityTable.table[1][i + 1].value.set(self.pastResistivity[i])
-            self.resistivityTable.table[2][i + 1].value.set(self.pastAlpha[i])
+            self.resistivityTable.set_value(0, i, self.pastResistivity[i])
+            self.resistivityTable.set_value(1, i, self.pastAlpha[i])
 
 
     def _loadCapacitanceFile(self):
@@ -306,6 +342,9 @@ class IteratorConfig(tk.Frame):
             "capacitance":self.capacitanceFile.get(),
             "outputFileName":output,
             "iterations":self.iterationNumber.get(),
+            "tolerance":self.tolerance.get(),
+            "warmStart":"true" if self.warmStart.get() else "false",
+            "reuseGrid":"true" if self.reuseGrid.get() else "false",
             "radius":",".join([str(x) for x in radius]),
             "resistivity":",".join(tuple(self.resistivityTable.get_values()[0])),
             "alpha":",".join(tuple(self.resistivityTable.get_values()[1])),
@@ -328,19 +367,25 @@ class IteratorConfig(tk.Frame):
                     self.outputName.set(line[1])
                 elif line[0] == "number of iterations":
                     self.iterationNumber.set(int(line[1]))
+                elif line[0] == "convergence tolerance":
+                    self.tolerance.set(line[1])
+                elif line[0] == "warm start":
+                    self.warmStart.set(line[1].lower() in ("true", "yes", "1"))
+                elif line[0] == "reuse time grid":
+                    self.reuseGrid.set(line[1].lower() in ("true", "yes", "1"))
                 elif line[0] == "radius data":
                     start, stop, step = [d(x) for x in line[1].split(',')]
-                    self.radiusTable.table[0][1].value.set(start)
-                    self.radiusTable.table[1][1].value.set(stop)
-                    self.radiusTable.table[2][1].value.set((stop - start) / step)
+                    self.radiusTable.set_value(0, 0, start)
+                    self.radiusTable.set_value(1, 0, stop)
+                    self.radiusTable.set_value(2, 0, (stop - start) / step)
                 elif line[0] == "resistivty data":
                     resistivity_data = [d(x) for x in line[1].split(',')]
                     self.resistorNumber.set(len(resistivity_data))
                     for i, value in enumerate(resistivity_data):
-                        self.resistivityTable.table[1][i + 1].value.set(value)
+                        self.resistivityTable.set_value(0, i, value)
                 elif line[0] == "temperature coefficient of resistivity data":
                     for i, value in enumerate([d(x) for x in line[1].split(',')]):
-                        self.resistivityTable.table[2][i + 1].value.set(value)
+                        self.resistivityTable.set_value(1, i, value)
                 elif line[0] == "gamma":
                     self.gamma.set(d(line[1]))
                 elif line[0] == "capacitances":
@@ -352,3 +397,77 @@ class IteratorConfig(tk.Frame):
     def _loadOutFolder(self):
         self.outputFolder.set(askdirectory(initialdir=os.path.expanduser("~"), title="Select folder"))
 
+
+class GraphPage(tk.Frame):
+
+    # Colours given to the traces in turn
+    colours = ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22",
+               "#17becf")
+
+    def __init__(self, parent, cont, *args, **kwargs):
+        tk.Frame.__init__(self, parent, *args, **kwargs)
+
+        self.graph = None
+
+        title = tk.Label(self, text="Results", font=("Verdana", 12))
+        title.grid(row=0, columnspan=4, column=0, sticky=tk.W, pady=5)
+
+        self.resultsFile = tk.StringVar(self)
+        resultsFileBtn = tk.Button(self, text="Load Results File", padx=5, command=self._loadResultsFile)
+        resultsFileLabel = tk.Label(self, textvariable=self.resultsFile, wraplength=400, justify=tk.LEFT)
+        resultsFileBtn.grid(row=1, column=0, sticky=tk.W, pady=5)
+        resultsFileLabel.grid(row=1, column=1, columnspan=3, sticky=tk.W, padx=20)
+
+        self.start = tk.StringVar(self)
+        self.stop = tk.StringVar(self)
+        startLbl = tk.Label(self, text="Start time: ")
+        stopLbl = tk.Label(self, text="Stop time: ")
+        startEntry = tk.Entry(self, textvariable=self.start)
+        stopEntry = tk.Entry(self, textvariable=self.stop)
+        drawBtn = tk.Button(self, text="Draw", padx=10, command=self.draw)
+        startLbl.grid(row=2, column=0, sticky=tk.W, pady=5)
+        startEntry.grid(row=2, column=1, sticky=tk.W, padx=20, pady=5)
+        stopLbl.grid(row=3, column=0, sticky=tk.W, pady=5)
+        stopEntry.grid(row=3, column=1, sticky=tk.W, padx=20, pady=5)
+        drawBtn.grid(row=3, column=2, sticky=tk.W, pady=5)
+
+        # Traces are decimated to the width of the canvas so it is redrawn whenever it changes size
+        self.canvas = tk.Canvas(self, width=600, height=300, background="white")
+        self.canvas.grid(row=4, column=0, columnspan=4, sticky=tk.NSEW, pady=5)
+        self.canvas.bind("<Configure>", self.draw)
+        self.grid_rowconfigure(4, weight=1)
+        self.grid_columnconfigure(3, weight=1)
+
+
+    def _loadResultsFile(self):
+        self.resultsFile.set(askopenfilename(initialdir=os.path.expanduser("~"), title="Select file", filetypes=(("Results files", ("*.txt", "*.csv", "*.raw", "*.npy")), ("All files", "*.*"))))
+        self.graph = GraphGetter(self.resultsFile.get()) if self.resultsFile.get() != "" else None
+        self.draw()
+
+
+    def draw(self, *args):
+
+        """
+        Plots every trace of the results file between the start and stop times, one point pair per pixel
+        """
+
+        self.canvas.delete("all")
+        if self.graph is None:
+            return
+
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        start = float(self.start.get()) if self.start.get().strip() != "" else None
+        stop = float(self.stop.get()) if self.stop.get().strip() != "" else None
+
+        plots = [(x, y) for x, y in self.graph.get_plots(start, stop, width) if len(x) > 1]
+        if len(plots) == 0:
+            return
+
+        xMin, xMax = min(x[0] for x, _ in plots), max(x[-1] for x, _ in plots)
+        yMin, yMax = min(y.min() for _, y in plots), max(y.max() for _, y in plots)
+        xScale = (width - 1) / (xMax - xMin) if xMax > xMin else 0
+        yScale = (height - 1) / (yMax - yMin) if yMax > yMin else 0
+
+        for index, (x, y) in enumerate(plots):
+            points = np.column_stack(((x - xMin) * xScale, height - 1 - (y - yMin) * yScale)).ravel()
+            self.canvas.create_line(*points.tolist(), fill=self.colours[index % len(self.colours)])
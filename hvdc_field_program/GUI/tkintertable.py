@@ -3,12 +3,12 @@ from tkinter import ttk
 
 
 class HeaderCell(tk.Frame):
-    
+
     def __init__(self, parent, text):
         tk.Frame.__init__(self, parent)
         self.text = tk.StringVar(self)
         self.text.set(text)
-        label = tk.Label(self, textvariable=self.text, bg="#D3D3D3", relief=tk.SUNKEN, padx=5, pady=2)      #font=("Verdana", 12), 
+        label = tk.Label(self, textvariable=self.text, bg="#D3D3D3", relief=tk.SUNKEN, padx=5, pady=2)      #font=("Verdana", 12),
         label.pack(side="top", fill="both", expand=True)
 
 
@@ -16,23 +16,27 @@ class HeaderCell(tk.Frame):
         return "HeaderCell({})".format(self.text)
 
 class DataCell(tk.Frame):
-    
+
     def __init__(self, parent):
         tk.Frame.__init__(self, parent)
 
         self.value = tk.StringVar(self)
 
-        entry = tk.Entry(self, textvariable=self.value, width=12)       #font=("Verdana", 8), 
-        entry.pack(side="top", fill="both", expand=True, ipady=3)
+        self.entry = tk.Entry(self, textvariable=self.value, width=12)       #font=("Verdana", 8),
+        self.entry.pack(side="top", fill="both", expand=True, ipady=3)
+
 
-    
     def __repr__(self):
         return "DataCell({})".format(self.value.get())
 
 
 class TkTable(tk.Frame):
-    
-    def __init__(self, parent, *args, **kwargs):
+
+    # Values are held in a 2D list and only the rows which fit on screen have widgets. Scrolling moves the values
+    # through the same widgets instead of creating new ones so tables of any length stay responsive.
+    # Row and column numbers in the methods below count data cells only, headers are not included.
+
+    def __init__(self, parent, *args, visibleRows=10, **kwargs):
 
         tk.Frame.__init__(self, parent, *args, **kwargs)
 
@@ -40,50 +44,72 @@ class TkTable(tk.Frame):
         self.rowHeader = False
         self.columns = 1
         self.rows = 1
-        self.table = [[DataCell(self)]]
-        
+        self.visibleRows = visibleRows
+
+        # Table model, headers and the first row shown
+        self.values = [[""]]
+        self.colHeaders = []
+        self.rowHeaders = []
+        self.top = 0
+
+        # Widgets for each visible row
+        self._cells = []
+        self._rowHeaderCells = []
+        self._colHeaderCells = []
+        self._loading = False
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._scroll)
+
         self._map()
 
 
     def get_values(self):
+        return [row[:] for row in self.values]
 
-        values = []
-        for row in self.table:
-            newRow = []
-            for cell in row:
-                try:
-                    newRow.append(cell.value.get())
-                except AttributeError:      # Header cell
-                    pass
 
-            if newRow != []:
-                values.append(newRow)
+    def set_value(self, row, column, value):
 
-        return values
+        """
+        Sets the value of a single data cell, updating its widget if it is on screen
+        """
 
+        self.values[row][column] = str(value)
+
+        if self.top <= row < self.top + len(self._cells):
+            self._show(row - self.top)
 
-    def append_row_data(self, headers=["--No Header--"]):
-        
-        number = len(headers) if isinstance(headers, list) else headers
-        addHeader = isinstance(self.table[-1][0], HeaderCell)
 
-        for i in range(number):
-            newRow = [DataCell(self) for x in range(self.columns)]
+    def set_values(self, values, headers=None):
 
-            if addHeader:
-                newRow = [HeaderCell(self, headers[i])] + newRow
+        """
+        Replaces every data row, keeping the number of columns. Row headers are replaced if given.
+        """
 
-            self.table.append(newRow)
-        
-        for y, row in enumerate(self.table):
-            if y < self.rows:
-                continue
-            for x, cell in enumerate(row):
-                cell.grid(row=y, column=x, sticky=tk.NSEW)
+        self.values = [[str(x) for x in row] + [""] * (self.columns - len(row)) for row in values]
+        if self.values == []:
+            self.values = [[""] * self.columns]
+        self.rows = len(self.values)
+
+        if self.rowHeader:
+            self.rowHeaders = [str(x) for x in headers] if headers is not None else self.rowHeaders[:self.rows]
+            self.rowHeaders += ["--No Header--"] * (self.rows - len(self.rowHeaders))
+
+        self.top = 0
+        self._map()
+
+
+    def append_row_data(self, headers=["--No Header--"]):
+
+        number = len(headers) if isinstance(headers, list) else headers
+
+        self.values.extend([[""] * self.columns for _ in range(number)])
+        if self.rowHeader:
+            self.rowHeaders.extend([str(x) for x in headers] if isinstance(headers, list) else ["--No Header--"] * number)
 
         self.rows += number
+        self._map()
+
 
-    
     def add_header(self, values, index=0):
 
         if len(values) != self.columns:
@@ -92,45 +118,43 @@ class TkTable(tk.Frame):
         elif self.colHeader:
             return
 
-        newHeaders = [[HeaderCell(self, str(x)) for x in values]]
-
-        if isinstance(self.table[-1][0], HeaderCell):
-            newHeaders = [[tk.Frame(self)] + newHeaders[0]]
-        
-        self._unmap()
-        self.table = self.table[:index] + newHeaders + self.table[index:]
-        self._map()
-
+        self.colHeaders = [str(x) for x in values]
         self.colHeader = True
 
+        self._colHeaderCells = [HeaderCell(self, x) for x in self.colHeaders]
+        for x, cell in enumerate(self._colHeaderCells):
+            cell.grid(row=0, column=x + 1, sticky=tk.NSEW)
+
 
     def add_column(self, headers=[], number=-1):
-        
+
         if self.colHeader and len(headers) == 0:
             print(self.colHeader, headers, number)
             raise ValueError("Not enough headers have been given")
-        
+
         elif len(headers) == 0 and not self.colHeader:
             number = 1 if number == -1 else number
 
         else:
             number = len(headers)
-        
 
-        for i, row in enumerate(self.table):
-            if isinstance(row[-1], HeaderCell):
-                for j in range(number):
-                    self.table[i].append(HeaderCell(self, headers[j]))
+        for row in self.values:
+            row.extend([""] * number)
 
-                    self.table[i][-1].grid(row=i, column=self.columns + self.rowHeader + j, sticky=tk.NSEW)
+        # Only the new column of widgets is created
+        if self.colHeader:
+            for header in headers:
+                self.colHeaders.append(str(header))
+                self._colHeaderCells.append(HeaderCell(self, header))
+                self._colHeaderCells[-1].grid(row=0, column=len(self.colHeaders), sticky=tk.NSEW)
 
-                
-            else:
-                for j in range(number):                   
-                    self.table[i].append(DataCell(self))
-                    self.table[i][-1].grid(row=i, column=self.columns + self.rowHeader + j, sticky=tk.NSEW)
+        for slot, cells in enumerate(self._cells):
+            for j in range(number):
+                cells.append(self._new_cell(slot, self.columns + j))
+            self._show(slot)
 
         self.columns += number
+        self._place_scrollbar()
 
 
     def add_row_headers(self, headers=[]):
@@ -138,19 +162,9 @@ class TkTable(tk.Frame):
         if self.rowHeader:
             return
 
-        self._unmap()
-
-        headerCount = 0
-        for i, row in enumerate(self.table):
-            if isinstance(row[-1], DataCell):
-                self.table[i] = [HeaderCell(self, headers[headerCount])] + self.table[i]
-                headerCount += 1
-
-            else:
-                self.table[i] = [tk.Frame(self)] + self.table[i]
-
-        self._map()
+        self.rowHeaders = [str(x) for x in headers] + ["--No Header--"] * (self.rows - len(headers))
         self.rowHeader = True
+        self._map()
 
 
     def remove_row(self):
@@ -158,10 +172,13 @@ class TkTable(tk.Frame):
         if self.rows == 1:
             return
 
-        self._unmap()
-        self.table = self.table[:-1]
-        self._map()
+        self.values.pop()
+        if self.rowHeader:
+            self.rowHeaders.pop()
+
         self.rows += -1
+        self.top = min(self.top, max(self.rows - self.visibleRows, 0))
+        self._map()
 
 
     def remove_column(self):
@@ -169,37 +186,163 @@ class TkTable(tk.Frame):
         if self.columns == 1:
             return
 
-        self._unmap()
-        
-        for i, row in enumerate(self.table):
-            self.table[i] = row[:-1]
+        for row in self.values:
+            row.pop()
+
+        if self.colHeader:
+            self.colHeaders.pop()
+            self._colHeaderCells.pop().destroy()
+
+        for cells in self._cells:
+            cells.pop().destroy()
 
-        self._map()
         self.columns += -1
+        self._place_scrollbar()
 
 
     def _reset(self):
         self._unmap()
 
+        for cell in self._colHeaderCells:
+            cell.destroy()
+
         self.colHeader = False
         self.rowHeader = False
         self.columns = 1
         self.rows = 1
-        self.table = [[DataCell(self)]]
-        
+        self.values = [[""]]
+        self.colHeaders = []
+        self.rowHeaders = []
+        self._colHeaderCells = []
+        self.top = 0
+
         self._map()
-        
-    
+
+
     def _unmap(self):
-        for row in self.table:
-            for cell in row:
-                cell.grid_forget()
 
-    
+        """
+        Destroys the widgets of every visible row
+        """
+
+        for cells in self._cells:
+            for cell in cells:
+                cell.destroy()
+        for cell in self._rowHeaderCells:
+            cell.destroy()
+
+        self._cells = []
+        self._rowHeaderCells = []
+
+
     def _map(self):
-        for y, row in enumerate(self.table):
-            for x, cell in enumerate(row):
-                cell.grid(row=y, column=x, sticky=tk.NSEW)
+
+        """
+        Makes sure there is a row of widgets for each visible row and shows the values from the first row on screen.
+        Only rows which have been added or removed from the screen have their widgets created or destroyed.
+        """
+
+        slots = min(self.rows, self.visibleRows)
+
+        # Row headers are created for every row or none
+        if self.rowHeader != (len(self._rowHeaderCells) == len(self._cells) and len(self._cells) > 0):
+            self._unmap()
+
+        while len(self._cells) > slots:
+            for cell in self._cells.pop():
+                cell.destroy()
+            if self._rowHeaderCells:
+                self._rowHeaderCells.pop().destroy()
+
+        while len(self._cells) < slots:
+            slot = len(self._cells)
+            self._cells.append([self._new_cell(slot, x) for x in range(self.columns)])
+            if self.rowHeader:
+                self._rowHeaderCells.append(HeaderCell(self, ""))
+                self._rowHeaderCells[-1].grid(row=slot + 1, column=0, sticky=tk.NSEW)
+
+        for slot in range(slots):
+            self._show(slot)
+
+        self._place_scrollbar()
+
+
+    def _new_cell(self, slot, column):
+
+        """
+        Creates the widget for one visible cell which writes any edits back to the table
+        """
+
+        cell = DataCell(self)
+        cell.grid(row=slot + 1, column=column + 1, sticky=tk.NSEW)
+        cell.value.trace("w", lambda *args: self._edit(slot, column, cell))
+        cell.entry.bind("<MouseWheel>", self._wheel)
+        cell.entry.bind("<Button-4>", self._wheel)
+        cell.entry.bind("<Button-5>", self._wheel)
+
+        return cell
+
+
+    def _edit(self, slot, column, cell):
+        if not self._loading and self.top + slot < self.rows:
+            self.values[self.top + slot][column] = cell.value.get()
+
+
+    def _show(self, slot):
+
+        """
+        Puts the values of the row currently in a slot into its widgets
+        """
+
+        self._loading = True
+        row = self.top + slot
+
+        for column, cell in enumerate(self._cells[slot]):
+            cell.value.set(self.values[row][column])
+        if self._rowHeaderCells:
+            self._rowHeaderCells[slot].text.set(self.rowHeaders[row])
+
+        self._loading = False
+
+
+    def _scroll(self, action, amount, unit=None):
+
+        """
+        Handles the scrollbar, moving the window of visible rows
+        """
+
+        if action == "moveto":
+            top = int(round(float(amount) * self.rows))
+        else:
+            top = self.top + int(amount) * (self.visibleRows if unit == "pages" else 1)
+
+        top = max(0, min(top, self.rows - len(self._cells)))
+        if top != self.top:
+            self.top = top
+            for slot in range(len(self._cells)):
+                self._show(slot)
+
+        self._place_scrollbar()
+
+
+    def _wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self._scroll("scroll", -1)
+        else:
+            self._scroll("scroll", 1)
+
+
+    def _place_scrollbar(self):
+
+        """
+        Only shows the scrollbar when there are more rows than fit on screen
+        """
+
+        if self.rows > self.visibleRows:
+            self.scrollbar.grid(row=1, rowspan=self.visibleRows, column=self.columns + 1, sticky=tk.NS)
+            self.scrollbar.set(self.top / self.rows, (self.top + len(self._cells)) / self.rows)
+        else:
+            self.scrollbar.grid_forget()
 
 
 if __name__ == "__main__":
@@ -218,13 +361,16 @@ if __name__ == "__main__":
     b21 = tk.Button(root, text="Add 5 lines", command=lambda: table.append_row_data(["1", "2", "3", "4", "5"]))
     b21.pack()
 
+    b22 = tk.Button(root, text="Add 10000 lines", command=lambda: table.append_row_data(10000))
+    b22.pack()
+
     b3 = tk.Button(root, text="Add Headers", command=lambda: table.add_header(["H{}".format(x) for x in range(table.columns)]))
     b3.pack()
 
     b4 = tk.Button(root, text="Add column", command=lambda: table.add_column(["Col"]))
     b4.pack()
 
-    b5 = tk.Button(root, text="Add row headers", command=lambda: table.add_row_headers(["C{}".format(x) for x in range(len(table.table) - table.colHeader)]))
+    b5 = tk.Button(root, text="Add row headers", command=lambda: table.add_row_headers(["C{}".format(x) for x in range(table.rows)]))
     b5.pack()
 
     b6 = tk.Button(root, text="Reset", command=table._reset)
@@ -236,4 +382,4 @@ if __name__ == "__main__":
     b8 = tk.Button(root, text="Remove Column", command=table.remove_column)
     b8.pack()
 
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
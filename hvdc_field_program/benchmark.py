@@ -0,0 +1,228 @@
+##############################################################
+#   Times each stage of the generator on synthetic models    #
+#   of any size and compares the results to a baseline       #
+##############################################################
+
+# Synthetic input files are laid out exactly like the real ones with smooth resistances that fall over time.
+# Sizes are given as layers x sections x time rows:
+#     example - 10 x 5 x 66, the size of the example data
+#     medium - 20 x 10 x 2,000
+#     production - 50 x 40 x 20,000. Takes a long time and a lot of memory so is only run when asked for
+#
+# Every stage is timed and then run again while tracing memory allocations to find its peak memory, as
+# tracing slows the code down. Output bytes are the size of what the stage creates, the file for main().
+#
+# Results are saved as JSON. Giving a baseline file prints the change in time and memory of every stage.
+
+# Imports argv to get commandline arguments
+from sys import argv, version
+import csv
+import json
+import os
+import time
+import tracemalloc
+import numpy as np
+import complex_generator as generator
+
+
+SIZES = {
+    "example": (10, 5, 66),
+    "medium": (20, 10, 2000),
+    "production": (50, 40, 20000)
+}
+
+# Sizes run when none are asked for
+DEFAULT_SIZES = ("example", "medium")
+
+
+def synthetic_input(outpt_file, layers, sections, rows, seed=0):
+
+    """
+    Writes a generator input file with random but realistic values
+
+    Args:
+        outpt_file - csv file to write
+        layers - number of layers in the model
+        sections - number of resistor capacitor pairs in each layer
+        rows - number of times in the resistor table
+        seed - seed of the random numbers so the same file is made every time
+    """
+
+    rng = np.random.default_rng(seed)
+
+    # Times spread out logarithmically like the example data
+    times = np.concatenate(([0.0], np.logspace(-8, np.log10(4500), rows - 1)))
+    start = 10 ** rng.uniform(11, 15, layers * sections)
+    decay = rng.uniform(0.1, 0.9, layers * sections)
+    resistances = start * (1 - decay * (1 - np.exp(-times[:, None] / 1000)))
+
+    capacitors = 10 ** rng.uniform(-11, -9, (layers, sections))
+
+    with open(outpt_file, "w", newline="") as output:
+        writer = csv.writer(output, dialect="excel")
+        writer.writerow(["C{}".format(x + 1) for x in range(sections)])
+        writer.writerows([["{:.3E}".format(x) for x in row] for row in capacitors])
+        writer.writerow(["Time"] + ["S{}R{}".format(l + 1, s + 1) for s in range(sections) for l in range(layers)])
+        for t, row in zip(times, resistances):
+            writer.writerow([repr(float(t))] + ["{:.6E}".format(x) for x in row])
+
+
+def measure(function, *args):
+
+    """
+    Runs a function to time it then again to find its peak memory.
+    Stages taking less than a second are timed a few times and the fastest kept as short timings are noisy.
+
+    Returns a tuple (result, seconds, peak bytes)
+    """
+
+    seconds = None
+    for _ in range(5):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        del result
+
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+        if elapsed > 1:
+            break
+
+    tracemalloc.start()
+    result = function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return result, seconds, peak
+
+
+def text_bytes(lines):
+
+    """
+    Total length of a list of strings, or a list of lists of strings
+    """
+
+    return sum(text_bytes(x) if isinstance(x, list) else len(x) for x in lines)
+
+
+def section_texts(resistorStrings, capacitorValues):
+
+    """
+    Creates the text of every section, see create_section_text() in complex_generator.py
+    """
+
+    return [generator.create_section_text(r + c, index)
+            for index, (r, c) in enumerate(zip(resistorStrings, capacitorValues))]
+
+
+def benchmark_size(inpt_file, outpt_file, setup_file, layers, sections):
+
+    """
+    Times every stage of the generator on a single input file
+
+    Returns a dictionary with the seconds, peak bytes and output bytes of each stage
+    """
+
+    stages = {}
+
+    def record(name, function, args, size=lambda result: None):
+        result, seconds, peak = measure(function, *args)
+        stages[name] = {"seconds": seconds, "peak bytes": peak, "output bytes": size(result)}
+        print("    {:<24}{:>10.3f} s{:>14,} B peak".format(name, seconds, peak))
+        return result
+
+    capacitorValues, resistorValues = record("read_data", generator.read_data, [inpt_file])
+    processed = record("process_resistorValues", generator.process_resistorValues, [resistorValues])
+    strings = record("gen_resistor_strings", generator.gen_resistor_strings, [processed, sections, layers],
+                     text_bytes)
+    record("create_section_text", section_texts, [strings, capacitorValues], text_bytes)
+
+    table = record("read_arrays", generator.read_arrays, [inpt_file], lambda result: result[1].nbytes)[1]
+    record("process_resistor_array", generator.process_resistor_array, [table],
+           lambda result: sum(x.nbytes for x in result))
+
+    record("main", generator.main, [inpt_file, outpt_file, setup_file], lambda result: os.path.getsize(outpt_file))
+
+    return stages
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, directory="dump", setup_file="config/generator_config.txt"):
+
+    """
+    Runs the benchmark on each size of model
+
+    Args:
+        sizes - names of sizes from SIZES or (layers, sections, rows) tuples
+        directory - folder to write the synthetic input and output files to
+        setup_file - generator setup file
+
+    Returns the results as a dictionary
+    """
+
+    results = {"python": version.split()[0], "numpy": np.__version__, "sizes": {}}
+    os.makedirs(directory, exist_ok=True)
+
+    for size in sizes:
+        layers, sections, rows = SIZES[size] if size in SIZES else size
+        name = size if size in SIZES else "{}x{}x{}".format(layers, sections, rows)
+        inpt_file = os.path.join(directory, "benchmark_{}.csv".format(name))
+        outpt_file = os.path.join(directory, "benchmark_{}.asc".format(name))
+
+        print("{} ({} layers, {} sections, {} rows)".format(name, layers, sections, rows))
+        synthetic_input(inpt_file, layers, sections, rows)
+
+        results["sizes"][name] = {"layers": layers, "sections": sections, "rows": rows,
+                                  "stages": benchmark_size(inpt_file, outpt_file, setup_file, layers, sections)}
+
+    return results
+
+
+def compare(results, baseline, threshold=0.1):
+
+    """
+    Prints the change in time and peak memory of every stage compared to a baseline.
+    Changes larger than the threshold, as a fraction of the baseline, are marked.
+
+    Returns the number of stages which got slower or used more memory by more than the threshold
+    """
+
+    regressions = 0
+
+    for name, size in results["sizes"].items():
+        if name not in baseline["sizes"]:
+            continue
+
+        print(name)
+        for stage, values in size["stages"].items():
+            old = baseline["sizes"][name]["stages"].get(stage)
+            if old is None:
+                continue
+
+            timeRatio = values["seconds"] / old["seconds"] if old["seconds"] else 1.0
+            memoryRatio = values["peak bytes"] / old["peak bytes"] if old["peak bytes"] else 1.0
+            worse = timeRatio > 1 + threshold or memoryRatio > 1 + threshold
+            regressions += worse
+
+            print("    {:<24}{:>8.2f}x time{:>8.2f}x memory{}".format(stage, timeRatio, memoryRatio,
+                                                                      "  <--" if worse else ""))
+
+    return regressions
+
+
+# Only runs program if its called as a script
+if __name__ == '__main__':
+    if len(argv) < 2 or argv[1][-5:] != ".json":
+        print("Incorrect arguments.")
+        print("Run program using: python benchmark.py [results file ending in .json] [Optional baseline .json file] [Optional sizes e.g. example medium production 10x5x66]")
+
+    else:
+        baseline = argv[2] if len(argv) > 2 and argv[2][-5:] == ".json" else None
+        sizes = [x if x in SIZES else tuple(int(y) for y in x.split("x"))
+                 for x in argv[2 + (baseline is not None):]] or DEFAULT_SIZES
+
+        results = run_benchmarks(sizes)
+        with open(argv[1], "w") as output:
+            json.dump(results, output, indent=4)
+
+        if baseline is not None:
+            with open(baseline, "r") as inpt:
+                compare(results, json.load(inpt))
@@ -0,0 +1,214 @@
+##############################################################
+#   Stores generated files and results under a hash of the   #
+#   inputs so identical runs are only done once              #
+##############################################################
+
+# Entries are kept as plain files in the cache folder named by the hash of everything that affects them.
+# The modification time of each entry is updated whenever it is used and the least recently used entries are
+# deleted once the folder grows past its size limit.
+
+import hashlib
+import os
+import shutil
+import tempfile
+import numpy as np
+from complex_generator import read_arrays, setup, process_resistor_array, write_output, text_waveform
+from transient_solver import solve_transient, write_results, waveform_file
+from timestep import read_schedule, plan_steps
+
+
+class ResultCache:
+
+    def __init__(self, directory="cache", max_bytes=1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+
+    def __repr__(self):
+        return "ResultCache({}, hits={}, misses={})".format(self.directory, self.hits, self.misses)
+
+
+    def _path(self, key, extension):
+        return os.path.join(self.directory, key + extension)
+
+
+    def fetch(self, key, outpt_file):
+
+        """
+        Copies the entry for the key to the output file if there is one
+
+        Returns True on a hit and False on a miss
+        """
+
+        path = self._path(key, os.path.splitext(outpt_file)[1])
+
+        try:
+            shutil.copyfile(path, outpt_file)
+            # Marks the entry as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        return True
+
+
+    def store(self, key, outpt_file):
+
+        """
+        Copies a newly created output file into the cache and removes old entries if the cache is too large.
+        Files larger than the whole cache are not stored.
+        """
+
+        if os.path.getsize(outpt_file) > self.max_bytes:
+            return
+
+        # Written under a temporary name and renamed so other workers never read a half written entry
+        handle, temp = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        os.close(handle)
+        try:
+            shutil.copyfile(outpt_file, temp)
+            os.replace(temp, self._path(key, os.path.splitext(outpt_file)[1]))
+        except BaseException:
+            os.remove(temp)
+            raise
+
+        self.evict()
+
+
+    def evict(self):
+
+        """
+        Deletes the least recently used entries until the cache is within its size limit
+        """
+
+        entries = []
+        for entry in os.scandir(self.directory):
+            # Entries still being written by other workers
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+            except FileNotFoundError:       # Removed by another process
+                pass
+
+        total = sum(x[1] for x in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+    def stats(self):
+
+        """
+        Returns a dictionary of the hit and miss counts along with the current size of the cache
+        """
+
+        sizes = [entry.stat().st_size for entry in os.scandir(self.directory) if not entry.name.endswith(".tmp")]
+
+        return {"hits": self.hits, "misses": self.misses, "entries": len(sizes), "bytes": sum(sizes)}
+
+
+def hash_inputs(capacitorValues, resistorValues, setupValues, *options):
+
+    """
+    Creates a key from the parsed inputs and any options that change the output
+
+    Args:
+        capacitorValues, resistorValues - values as returned by read_arrays()
+        setupValues - list of values as returned by setup()
+        options - anything else that affects the output e.g. the resistor format
+
+    Returns the key as a hex string
+    """
+
+    digest = hashlib.sha256()
+
+    for row in capacitorValues:
+        digest.update((",".join(row) + "\n").encode())
+
+    resistorValues = np.ascontiguousarray(resistorValues, dtype=np.float64)
+    digest.update(repr(resistorValues.shape).encode())
+    digest.update(resistorValues.tobytes())
+
+    digest.update(repr((list(setupValues), options)).encode())
+
+    # A voltage read from a file only names the file in the setup values so its contents are hashed as well
+    waveform = waveform_file(setupValues[0])
+    if waveform is not None:
+        with open(waveform, "rb") as inpt:
+            for block in iter(lambda: inpt.read(1 << 20), b""):
+                digest.update(block)
+
+    return digest.hexdigest()
+
+
+def cached_generate_schematic(inpt_file, outpt_file, setup_file="config/generator_config.txt", cache=None,
+                              resistor_format="nested", rel_tol=None, max_segments=None):
+
+    """
+    Same as generate_schematic() but reuses the output of an earlier run with identical inputs
+
+    Returns True if the output came from the cache
+    """
+
+    if inpt_file[-4:] not in (".csv", ".npy") or outpt_file[-4:] not in (".asc", ".cir") or setup_file[-4:] != ".txt":
+        raise ValueError("Incorrect File types")
+
+    cache = ResultCache() if cache is None else cache
+
+    # A .npy waveform is copied next to the output and the output names the copy, so the key has to include
+    # the copy. Writing it before the lookup also means a cached output never points at a missing file.
+    setupValues = text_waveform(setup(setup_file), outpt_file)
+    capacitorValues, resistorValues = read_arrays(inpt_file)
+    key = hash_inputs(capacitorValues, resistorValues, setupValues, "generate", resistor_format, rel_tol, max_segments)
+
+    if cache.fetch(key, outpt_file):
+        return True
+
+    write_output(outpt_file, capacitorValues, resistorValues, setupValues, resistor_format, rel_tol, max_segments)
+    cache.store(key, outpt_file)
+
+    return False
+
+
+def cached_simulate(inpt_file, outpt_file, setup_file="config/generator_config.txt", cache=None):
+
+    """
+    Same as transient_solver.simulate() but reuses the results of an earlier run with identical inputs
+
+    Returns True if the results came from the cache
+    """
+
+    if inpt_file[-4:] not in (".csv", ".npy") or outpt_file[-4:] != ".txt" or setup_file[-4:] != ".txt":
+        raise ValueError("Incorrect File types")
+
+    cache = ResultCache() if cache is None else cache
+
+    setupValues = setup(setup_file)
+    schedule = read_schedule(setup_file)
+    capacitorValues, resistorValues = read_arrays(inpt_file)
+    key = hash_inputs(capacitorValues, resistorValues, setupValues, "simulate", schedule)
+
+    if cache.fetch(key, outpt_file):
+        return True
+
+    v_string, parasiticResistance, timeStart, timeStop, timeStep, _ = setupValues
+    grid, _ = plan_steps(setupValues, schedule, resistorValues[:, 0])
+    times, voltages = solve_transient(capacitorValues, process_resistor_array(resistorValues), v_string,
+                                      parasiticResistance, timeStop, timeStep, timeStart, grid=grid)
+    write_results(outpt_file, times, voltages)
+    cache.store(key, outpt_file)
+
+    return False
@@ -12,74 +12,374 @@
 # Next line contains header information for human readability
 # Finally the remaining lines have time on the left followed by (S1R1 -> S10R1) -> (S1R5 -> S10R5)   
 
+# The input can also be a .npy file converted from the csv file by series_store.py
+
 # The program outputs a file which should include a .asc ending which is readable by LTSpice
+# or a .cir ending for a SPICE netlist which can be simulated without a schematic
 
 # Imports argv to get commandline arguments
 from sys import argv
 import csv
-from templatebuilder import TemplateBuilder
+import os
+from array import array
+import hashlib
+import numpy as np
+from section_template import render_section
+from simplify import simplify_resistor_array
+from series_store import load_series
+from profiler import Profiler, NULL_PROFILER
+from incremental import SectionIndex, index_file, layer_fingerprints
+
+
+# Size of the output buffer so sections are written to disk in large blocks
+WRITE_BUFFER = 1 << 20
+
+# Settings read from the setup file in the order setup() returns them
+SETUP_KEYS = ("voltage", "parasitic resistance", "time start", "time stop", "time step", "compression")
 
 
-def generate_schematic(inpt_file, outpt_file, setup_file="config/generator_config.txt"):
-    if inpt_file[-4:] != ".csv" or outpt_file[-4:] != ".asc" or setup_file[-4:] != ".txt":
+def generate_schematic(inpt_file, outpt_file, setup_file="config/generator_config.txt", resistor_format="nested",
+                       rel_tol=None, max_segments=None, initial=None, share_waveforms=False, profile=None,
+                       profile_stats=None, incremental=False):
+    if inpt_file[-4:] not in (".csv", ".npy") or outpt_file[-4:] not in (".asc", ".cir") or setup_file[-4:] != ".txt":
         raise ValueError("Incorrect File types")
-    main(inpt_file, outpt_file, setup_file)
+
+    # Profiling is only switched on when a report or stats file is given
+    profiler = NULL_PROFILER if profile is None and profile_stats is None else Profiler(stats_file=profile_stats)
+    with profiler:
+        main(inpt_file, outpt_file, setup_file, resistor_format, rel_tol, max_segments, initial, share_waveforms,
+             profiler, incremental)
+
+    if profile is not None:
+        profiler.save(profile)
 
     return 0
     
 
-def main(inpt_file, outpt_file, setup_file):
+def main(inpt_file, outpt_file, setup_file, resistor_format="nested", rel_tol=None, max_segments=None,
+         initial=None, share_waveforms=False, profiler=NULL_PROFILER, incremental=False):
 
     """ 
     Structures the flow of the program.
     Reads in data from the import file and writes the resultant schematic to the output file.
+    A netlist is written instead if the output file ends in .cir
     Notably will automatically overwrite the output file.
-    Takes no inputs and returns no output 
+    resistor_format selects how the resistor functions are written, see resistor_expression()
+    Giving rel_tol or max_segments removes breakpoints that barely change the resistance, see simplify.py
+    Giving initial starts the simulation from those node voltages, see initial_conditions()
+    share_waveforms writes resistor functions used more than once a single time, see shared_waveforms()
+    profiler records the time and memory of each stage, see profiler.py
+    incremental copies the layers which have not changed since the last run from the old output, see incremental.py
+    and returns the number of layers copied
     """
 
     # Reads in values from configuration file
-    v_string, parasiticResistance, timeStart, timeStop, timeStep, compression = setup(setup_file)
+    with profiler.stage("setup"):
+        setupValues = setup(setup_file)
+
+    # Reads and organises data from the input file. Resistor values are parsed straight into an array
+    with profiler.stage("read"):
+        capacitorValues, resistorValues = read_arrays(inpt_file)
+
+    # The time step is written as given even with a graded schedule, see timestep.py. The resistances change
+    # through If(time < ...) expressions which LTSpice does not treat as breakpoints so a larger maximum step
+    # could step straight over them
+
+    return write_output(outpt_file, capacitorValues, resistorValues, setupValues, resistor_format, rel_tol,
+                        max_segments, initial, share_waveforms, profiler, incremental)
+
+
+def write_output(outpt_file, capacitorValues, resistorValues, setupValues, resistor_format="nested", rel_tol=None,
+                 max_segments=None, initial=None, share_waveforms=False, profiler=NULL_PROFILER, incremental=False):
+
+    """ 
+    Writes a schematic, or a netlist if the output file ends in .cir, from values that have already been read
+
+    Args:
+        outpt_file - file to write to
+        capacitorValues, resistorValues - values as returned by read_arrays()
+        setupValues - list of values as returned by setup()
+        resistor_format, rel_tol, max_segments, initial, share_waveforms, profiler, incremental - as for main()
+
+    Returns the number of layers copied from the old output when incremental, otherwise None
+    """
+
+    setupValues = text_waveform(setupValues, outpt_file)
+
+    if rel_tol is not None or max_segments is not None:
+        # Drops breakpoints within tolerance and calculates the lines between those that are left
+        with profiler.stage("interpolate"):
+            breakpoints, removed = simplify_resistor_array(resistorValues, rel_tol, max_segments)
+            columns = [breakpoint_segments(times, values) for times, values in breakpoints]
+        print("Simplification removed {} of {} resistor segments".format(
+            removed, (resistorValues.shape[0] - 1) * (resistorValues.shape[1] - 1)))
+    else:
+        # Calculates equations of straight lines between resistor values in time
+        with profiler.stage("interpolate"):
+            columns = array_columns(*process_resistor_array(resistorValues))
+
+    with profiler.stage("share waveforms"):
+        names, functions = shared_waveforms(columns, resistor_format) if share_waveforms else (None, [])
+
+    # The index of a previous incremental run would no longer match the file
+    if not incremental:
+        if os.path.exists(index_file(outpt_file)):
+            os.remove(index_file(outpt_file))
+        sectionIndex = None
+
+    else:
+        with profiler.stage("fingerprint"):
+            settings = repr((outpt_file[-4:], resistor_format, len(capacitorValues), len(capacitorValues[0])))
+            sectionIndex = SectionIndex(outpt_file, layer_fingerprints(columns, capacitorValues, settings, names),
+                                        settings)
+
+    try:
+        if outpt_file[-4:] == ".cir":
+            write_netlist(outpt_file, columns, capacitorValues, setupValues, resistor_format, initial, names,
+                          functions, profiler, sectionIndex)
+        else:
+            write_schematic(outpt_file, columns, capacitorValues, setupValues, resistor_format, initial, names,
+                            functions, profiler, sectionIndex)
+
+    except BaseException:
+        if sectionIndex is not None:
+            sectionIndex.abort()
+        raise
+
+    if sectionIndex is not None:
+        return sectionIndex.finish()
+
+
+def write_schematic(outpt_file, columns, capacitorValues, setupValues, resistor_format="nested", initial=None,
+                    names=None, functions=(), profiler=NULL_PROFILER, section_index=None):
+
+    """ 
+    Writes the schematic to the output file one section at a time.
+
+    Args:
+        outpt_file - file to write the schematic to
+        columns - line segments of each resistor as returned by array_columns()
+        capacitorValues - table of capacitor values, one row per layer
+        setupValues - list of values as returned by setup()
+        resistor_format - how the resistor functions are written, see resistor_expression()
+        initial - node voltages to start the simulation from, see initial_conditions()
+        names, functions - shared resistor functions as returned by shared_waveforms()
+        profiler - records the time of each stage, see profiler.py
+        section_index - writes to its temporary file and copies unchanged layers from the old output instead of
+                        building them, see incremental.py
+    """
 
-    # Reads and organises data from the input file
-    capacitorValues, resistorValues = read_data(inpt_file)
-    # Calculates equations of straight lines between resistor values in time
-    resistorValues = process_resistorValues(resistorValues)
-    # Converts line equations into a single if/elif/else statement for each resistor
-    resistorValues = gen_resistor_strings(resistorValues, len(capacitorValues[0]), len(capacitorValues))
-    # Combines the resistor values and capacitor values into one list
-    data = [resistorValues[x] + capacitorValues[x] for x in range(len(capacitorValues))]
+    v_string, parasiticResistance, timeStart, timeStop, timeStep, compression = setupValues
+    layers, sections = len(capacitorValues), len(capacitorValues[0])
 
     # Opens output file for writing
-    with open(outpt_file, 'w') as output:
+    with open(outpt_file if section_index is None else section_index.temp_file, 'w', buffering=WRITE_BUFFER) as output:
         
         # Writes in standard header for schematic
         output.writelines(["Version 4\n", "SHEET 1 880 680\n"])
 
         # Writes in wires and a voltage source connecting the top to the bottom of the stack of sections
         output.writelines(["WIRE 0 0 -480 0\n", 
-                           "WIRE -480 0 -480 " + str(352 * len(data) + 96) + "\n",
-                           "WIRE 0 " + str(352 * len(data) + 96) + " -480 " + str(352 * len(data) + 96) + "\n",
-                           "WIRE 0 " + str(352 * len(data)) + " 0 " + str(352 * len(data) + 96) + "\n",
-                           "SYMBOL voltage -480 " + str(352 * len(data) - 32) + " R0\n",
+                           "WIRE -480 0 -480 " + str(352 * layers + 96) + "\n",
+                           "WIRE 0 " + str(352 * layers + 96) + " -480 " + str(352 * layers + 96) + "\n",
+                           "WIRE 0 " + str(352 * layers) + " 0 " + str(352 * layers + 96) + "\n",
+                           "SYMBOL voltage -480 " + str(352 * layers - 32) + " R0\n",
                            "SYMATTR InstName V1\n", 
                            "SYMATTR Value " + v_string + "\n",
                            "SYMATTR SpiceLine Rser=" + parasiticResistance + "\n",
-                           "FLAG 0 " + str(352 * len(data) + 96) + " 0\n"])
-
-        # Uses resistor and capacitor data to create and write each section to the output file
-        for index, template in enumerate(data):
-            for line in create_section_text(template, index):
-                output.write(line)
+                           "FLAG 0 " + str(352 * layers + 96) + " 0\n"])
+
+        # Converts the line equations into functions of time one layer at a time so only one section is
+        # held in memory. Each section is written to the output file as soon as it is created
+        if section_index is not None:
+            section_index.begin(output)
+        for index in range(layers):
+            if section_index is not None and section_index.reusable(index):
+                with profiler.stage("write"):
+                    section_index.copy(index, output)
+                continue
+
+            with profiler.stage("expressions"):
+                template = layer_resistor_strings(columns, index, layers, sections, resistor_format,
+                                                  names=names) + capacitorValues[index]
+            with profiler.stage("sections"):
+                lines = create_section_text(template, index)
+            with profiler.stage("write"):
+                output.writelines(lines)
+
+            if section_index is not None:
+                section_index.add(index, lines)
+
+        # Labels the top of each section so results and initial conditions can refer to it by name
+        output.writelines(["FLAG 0 {} n{:03d}\n".format(352 * x, x + 1) for x in range(layers)])
 
         # Sets positioning of SPICE directives so they can be read clearly off of the schematic
         op_x = -512
-        op_y = 352 * len(data) + 128
+        op_y = 352 * layers + 128
         # Directive specifying running parameter
         output.write("TEXT " + str(op_x) + " " + str(op_y) + " Left 2 !.tran 0 "
-                     + timeStop + " " + timeStart + " " + timeStep + " startup\n")
+                     + timeStop + " " + timeStart + " " + timeStep + ("" if initial is not None else " startup") + "\n")
         # Directive specifying calculation tolerences
         output.write("TEXT " + str(op_x) + " " + str(op_y + 48)
                      + " Left 2 !.options gmin=1E-24 abstol=1E-18 reltol=1E-6 vntol=1E-6 plotwinsize=" + compression + "\n")
+        # Directive specifying the starting node voltages
+        if initial is not None:
+            output.write("TEXT " + str(op_x) + " " + str(op_y + 96) + " Left 2 !" + initial_conditions(initial) + "\n")
+        # Directives defining the shared resistor functions
+        output.writelines(["TEXT " + str(op_x) + " " + str(op_y + 144 + 48 * x) + " Left 2 !" + function + "\n"
+                           for x, function in enumerate(functions)])
+
+        with profiler.stage("write"):
+            output.flush()
+        profiler.add_bytes("write", output.tell())
+
+
+def write_netlist(outpt_file, columns, capacitorValues, setupValues, resistor_format="nested", initial=None,
+                  names=None, functions=(), profiler=NULL_PROFILER, section_index=None):
+
+    """ 
+    Writes the model as a SPICE netlist one layer at a time.
+    The capacitors of each layer are an instance of a single section subcircuit with the capacitor values passed in
+    as parameters. Subcircuit parameters are only worked out once when the netlist is read, so the resistors which
+    change with time are written out in full for each layer and connect to the subcircuit's pins.
+    Layer boundaries are named n001 downwards from the top of the stack.
+
+    Args:
+        outpt_file - file to write the netlist to
+        columns - line segments of each resistor as returned by array_columns()
+        capacitorValues - table of capacitor values, one row per layer
+        setupValues - list of values as returned by setup()
+        resistor_format - how the resistor functions are written, see resistor_expression()
+        initial - node voltages to start the simulation from, see initial_conditions()
+        names, functions - shared resistor functions as returned by shared_waveforms()
+        profiler - records the time of each stage, see profiler.py
+        section_index - writes to its temporary file and copies unchanged layers from the old output instead of
+                        building them, see incremental.py
+    """
+
+    v_string, parasiticResistance, timeStart, timeStop, timeStep, compression = setupValues
+    layers, sections = len(capacitorValues), len(capacitorValues[0])
+
+    with open(outpt_file if section_index is None else section_index.temp_file, 'w', buffering=WRITE_BUFFER) as output:
+
+        output.write("* Complex model of " + str(layers) + " layers created by complex_generator.py\n")
+        output.writelines(section_subcircuit(sections))
+        output.writelines([function + "\n" for function in functions])
+
+        # Voltage source connects the top of the stack to ground
+        output.write("V1 n001 0 " + v_string + " Rser=" + parasiticResistance + "\n")
+
+        if section_index is not None:
+            section_index.begin(output)
+        for index in range(layers):
+            if section_index is not None and section_index.reusable(index):
+                with profiler.stage("write"):
+                    section_index.copy(index, output)
+                continue
+
+            top = "n{:03d}".format(index + 1)
+            bottom = "0" if index == layers - 1 else "n{:03d}".format(index + 2)
+            # Nodes between the resistor and capacitor of each series branch
+            branches = ["b{}_{}".format(index + 1, x) for x in range(2, sections + 1)]
+
+            with profiler.stage("expressions"):
+                resistors = layer_resistor_strings(columns, index, layers, sections, resistor_format, prefix="",
+                                                   names=names)
+            # One parameter per line so lines stay a readable length
+            lines = (["X{} {} section params:\n".format(index + 1, " ".join([top, bottom] + branches))]
+                     + ["+ C{}={}\n".format(x + 1, value) for x, value in enumerate(capacitorValues[index])]
+                     + ["R{}_{} {} {} R={{{}}}\n".format(index + 1, x + 1, top, node, value)
+                        for x, (node, value) in enumerate(zip([bottom] + branches, resistors))])
+            with profiler.stage("write"):
+                output.writelines(lines)
+
+            if section_index is not None:
+                section_index.add(index, lines)
+
+        # Same simulation directives as the schematic
+        output.write(".tran 0 " + timeStop + " " + timeStart + " " + timeStep
+                     + ("" if initial is not None else " startup") + "\n")
+        output.write(".options gmin=1E-24 abstol=1E-18 reltol=1E-6 vntol=1E-6 plotwinsize=" + compression + "\n")
+        if initial is not None:
+            output.write(initial_conditions(initial) + "\n")
+        output.write(".end\n")
+
+        with profiler.stage("write"):
+            output.flush()
+        profiler.add_bytes("write", output.tell())
+
+
+def text_waveform(setupValues, outpt_file):
+
+    """
+    LTSpice can only read waveform files written as text. A .npy waveform is written out as a text file of
+    time voltage pairs next to the output and the voltage source is pointed at that instead.
+
+    Returns the setup values to write the output with
+    """
+
+    # Imported here as the solver imports this file
+    from transient_solver import waveform_file, read_waveform
+
+    waveform = waveform_file(setupValues[0])
+    if waveform is None or waveform[-4:] != ".npy":
+        return setupValues
+
+    path = os.path.abspath(os.path.splitext(outpt_file)[0] + "_voltage.txt")
+    np.savetxt(path, np.column_stack(read_waveform(waveform)), fmt="%.17g", delimiter=",")
+
+    return [pwl_file(path)] + list(setupValues[1:])
+
+
+def pwl_file(path):
+
+    """
+    Creates the voltage source value which reads a waveform file. Paths with spaces are quoted.
+    """
+
+    return "PWL file=" + ('"' + path + '"' if " " in path else path)
+
+
+def initial_conditions(initial):
+
+    """ 
+    Creates the directive which starts the simulation from known node voltages, e.g. the solution of the
+    previous iteration, instead of ramping the source up from 0V. The startup option is left off the .tran
+    directive whenever this is used.
+
+    Args:
+        initial - voltage at the top of each layer, n001 first
+
+    Returns the .ic directive as a string
+    """
+
+    return ".ic " + " ".join(["V(n{:03d})={}".format(x + 1, repr(float(v))) for x, v in enumerate(initial)])
+
+
+def section_subcircuit(sections):
+
+    """ 
+    Creates the subcircuit definition for the capacitors of a single section of the model.
+    The first capacitor is across the section and every other one runs from a branch pin to the bottom, with the
+    resistors of the layer connecting the top to each branch pin outside of the subcircuit.
+
+    Args:
+        sections - the number of resistor capacitor pairs in the section
+
+    Returns a list of netlist lines
+    """
+
+    pins = " ".join(["top", "bottom"] + ["b{}".format(x) for x in range(2, sections + 1)])
+    params = " ".join(["C{}=1".format(x + 1) for x in range(sections)])
+    lines = [".subckt section " + pins + " params: " + params + "\n",
+             "C1 top bottom {C1}\n"]
+
+    for x in range(2, sections + 1):
+        lines.append("C{0} b{0} bottom {{C{0}}}\n".format(x))
+
+    lines.append(".ends section\n")
+
+    return lines
 
 
 def read_data(inpt_file):
@@ -98,6 +398,53 @@ def read_data(inpt_file):
 
     # Stores values for capacitors and resistors separately
     sec_val = [[], []]
+    for capacitor, line in iter_data(inpt_file):
+        sec_val[0 if capacitor else 1].append(line)
+
+    return sec_val
+
+
+def read_arrays(inpt_file):
+
+    """ 
+    Reads the data from the input file without keeping the resistor values as strings.
+    Rows are parsed one at a time straight into an array.
+    Files converted by series_store.py (.npy) are memory mapped instead of parsed.
+
+    Returns a tuple (capacitor values, resistor table):
+        capacitor values - list of lists of strings as returned by read_data()
+        resistor table - 2D float64 array as returned by resistor_array()
+    """
+
+    if inpt_file[-4:] == ".npy":
+        header, table = load_series(inpt_file)
+        return header["capacitors"], table
+
+    capacitorValues = []
+    # Flat store of resistor values which is reshaped once the width of the table is known
+    resistorValues = array("d")
+    width = 0
+
+    for capacitor, line in iter_data(inpt_file):
+        if capacitor:
+            capacitorValues.append(line)
+        else:
+            width = len(line)
+            resistorValues.extend(float(x) for x in line)
+
+    return capacitorValues, np.frombuffer(resistorValues, dtype=np.float64).reshape(-1, width)
+
+
+def iter_data(inpt_file):
+
+    """ 
+    Lazily reads the input file one row at a time
+
+    Yields a tuple (capacitor, values) for each row which is not a header:
+        capacitor - True if the row holds capacitor values and False if it holds resistor values
+        values - list of the values in the row as strings
+    """
+
     # Used to keep track of whether to add values to resistors or capacitors
     headerCount = 0
     # Attempts to open file and read in values and raises value error if it cant
@@ -109,23 +456,16 @@ def read_data(inpt_file):
                 # Skip headings
                 if (line[0][0]).isalpha():
                     headerCount += 1
-                     
-                # Creates a list of values and adds them
+
+                # Values are for capacitors when after the first header and resistors after that
                 else:
-                    # Values are for capacitors
-                    if headerCount == 1:
-                        sec_val[0].append([x for x in line if x != ""])
-                    # Values are for resistors
-                    else:
-                        sec_val[1].append([x for x in line if x != ""])
+                    yield headerCount == 1, [x for x in line if x != ""]
 
     # Raises error if file not found
     except FileNotFoundError as e:
         print(inpt_file)
         raise ValueError("Input file does not exist\nMake sure you include the file extension") from e
 
-    return sec_val
-
 
 def create_section_text(values, depth):
 
@@ -143,11 +483,8 @@ def create_section_text(values, depth):
         List of strings which detail part of the overall circuit
     """
 
-    # Creates an object that creates sections
-    builder = TemplateBuilder(values, depth)
-
-    # Returns what the object builds
-    return builder.build_section()
+    # Fills in a template compiled from TemplateBuilder the first time a section of this size is created
+    return render_section(values, depth)
 
 
 def linear_interpolate(x1, y1, x2, y2):
@@ -215,54 +552,272 @@ def process_resistorValues(values):
     return update
 
 
-def gen_resistor_strings(values, sections, layers):
+def resistor_array(values):
+
+    """  
+    Parses a table of time against resistances into a single array of floats
+
+    Args:
+        values - a list of lists where the first column is time and the rest are resistance values
+
+    Returns a 2D float64 array with the same layout as the table
+    """
+
+    return np.array(values, dtype=np.float64)
+
+
+def process_resistor_array(table):
+
+    """  
+    Array version of process_resistorValues(). Calculates the line segment between every pair of consecutive
+    rows for every resistor at once.
+
+    Args:
+        table - a 2D array where the first column is time and the rest are resistance values
+
+    Returns a tuple (times, slopes, intercepts):
+        times - the end time of each line segment
+        slopes, intercepts - m and c from y = m*x + c with one row per segment and one column per resistor
+    """
+
+    # End and start points of each segment. Time is kept 2D so it broadcasts across the resistors
+    x1, y1 = table[1:, :1], table[1:, 1:]
+    x2, y2 = table[:-1, :1], table[:-1, 1:]
+
+    # Uses the same calculation as linear_interpolate so both paths give identical values
+    slopes = (y1 - y2) / (x1 - x2)
+    intercepts = ((y2 * x1) - (y1 * x2)) / (x1 - x2)
+
+    return table[1:, 0], slopes, intercepts
+
+
+def segment_arrays(values):
+
+    """  
+    Converts the output of process_resistorValues() into the arrays returned by process_resistor_array()
+    """
+
+    times = np.array([float(line[0]) for line in values])
+    slopes = np.array([[val[0] for val in line[1:]] for line in values], dtype=np.float64)
+    intercepts = np.array([[val[1] for val in line[1:]] for line in values], dtype=np.float64)
+
+    return times, slopes, intercepts
+
+
+def gen_resistor_strings(values, sections, layers, mode="nested"):
 
     """  
-    Takes a table of time against linear equations and returns nested if statement as a string.
-    The if statment combines the equations to give an approximate function in time. 
+    Takes a table of time against linear equations and returns a function of time as a string for each resistor.
+    Kept for compatibility with the output of process_resistorValues(), see gen_resistor_array_strings()
 
     Args:
         values - a list of lists where the first column is time and the rest are m, c tuples from y = m*x + c
         sections - the number or resistors there are in each layer
         layers - number of layers in the model
+        mode - how each function is written, see resistor_expression()
 
     Returns a list of resistance functions for each resistor in each layer
     """
 
-    # Stores width of the table to avoid multiple calls to len
-    width = len(values[0]) - 1
-    # Counts the number of brackets required
-    bcount = 0
+    return gen_resistor_array_strings(*segment_arrays(values), sections, layers, mode)
 
-    # Stores string for each resistor.
-    # Initialised with R = for LTSpice resistor value
-    strings = ["R = " for _ in range(width)]
-    times = ["" for _ in range(width)]
 
+def gen_resistor_array_strings(times, slopes, intercepts, sections, layers, mode="nested"):
 
-    for line in values:
-        # Stores the current time as a float and adds 1 to the bracket count
-        time = float(line[0])
-        bcount += 1
+    """  
+    Takes the line segments from process_resistor_array() and returns a function of time as a string for each
+    resistor. The function combines the equations to give an approximate function in time. 
 
-        # Loops through each linear approximation and adds it to the nested if statements
-        for index, val in enumerate(line[1:]):
-            strings[index] += "".join(["If(time < ", str(time), ", ", str(val[0]), " * time + ", str(val[1]), ", "])
+    Args:
+        times, slopes, intercepts - arrays as returned by process_resistor_array()
+        sections - the number or resistors there are in each layer
+        layers - number of layers in the model
+        mode - how each function is written, see resistor_expression()
 
-            # Stores latest end value
-            times[index] = (time * val[0]) + val[1]
+    Returns a list of resistance functions for each resistor in each layer
+    """
 
-    # Adds constant at the end and adds all brackets required
-    for i in range(width):
-        strings[i] += str(times[i]) + ")" * bcount
+    return gen_resistor_column_strings(array_columns(times, slopes, intercepts), sections, layers, mode)
 
-    # Rearranges the table so it is the same format as the capacitor table
-    reformat = [["" for x in range(sections)] for i in range(layers)]
-    for index, value in enumerate(strings):
-        reformat[index % layers][index // layers] = value
 
-    # returns strings in reformated table
-    return reformat
+def gen_resistor_column_strings(columns, sections, layers, mode="nested"):
+
+    """  
+    Takes the line segments of each resistor and returns a function of time as a string for each resistor.
+
+    Args:
+        columns - list with a (times, slopes, intercepts) tuple for each resistor in the order of the input file
+        sections - the number or resistors there are in each layer
+        layers - number of layers in the model
+        mode - how each function is written, see resistor_expression()
+
+    Returns a list of resistance functions for each resistor in each layer
+    """
+
+    # Table is built in the same format as the capacitor table
+    return [layer_resistor_strings(columns, layer, layers, sections, mode) for layer in range(layers)]
+
+
+def layer_resistor_strings(columns, layer, layers, sections, mode="nested", prefix="R = ", names=None):
+
+    """  
+    Creates the resistance functions of time for the resistors in a single layer
+
+    Args:
+        columns - list with a (times, slopes, intercepts) tuple of arrays for each resistor in the order of
+                  the input file
+        layer - the layer to create the functions for
+        layers - number of layers in the model
+        sections - the number or resistors there are in each layer
+        mode - how each function is written, see resistor_expression()
+        prefix - added to the start of each function. Defaults to R = for LTSpice resistor value
+        names - shared function used by each resistor as returned by shared_waveforms(). Resistors with a shared
+                function call it instead of writing out the whole function
+
+    Returns a list of strings, one for each section
+    """
+
+    # Resistors in the input file go through every layer for the first section then every layer for the next
+    strings = []
+    for section in range(sections):
+        if names is not None and names[section * layers + layer] is not None:
+            strings.append(prefix + names[section * layers + layer] + "(time)")
+            continue
+
+        # Values are converted to lists so they are written exactly as python floats
+        times, slopes, intercepts = columns[section * layers + layer]
+        strings.append(prefix + resistor_expression(times.tolist(), slopes.tolist(), intercepts.tolist(), mode))
+
+    return strings
+
+
+def array_columns(times, slopes, intercepts):
+
+    """  
+    Splits the arrays from process_resistor_array() into a (times, slopes, intercepts) tuple for each resistor.
+    The columns are views so no values are copied.
+    """
+
+    return [(times, slopes[:, index], intercepts[:, index]) for index in range(slopes.shape[1])]
+
+
+def shared_waveforms(columns, mode="nested"):
+
+    """  
+    Finds resistors with identical line segments so their function can be written once and shared.
+    Each set of segments is hashed and every one used by more than one resistor becomes a .func directive
+    which the resistors call by name.
+
+    Args:
+        columns - list with a (times, slopes, intercepts) tuple of arrays for each resistor
+        mode - how each function is written, see resistor_expression()
+
+    Returns a tuple (names, functions):
+        names - name of the function used by each resistor, None for resistors with a unique function
+        functions - list of .func directives, one for each shared function
+    """
+
+    keys = []
+    first = {}
+    counts = {}
+    for index, column in enumerate(columns):
+        digest = hashlib.sha1()
+        for values in column:
+            digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+            digest.update(b"|")
+        key = digest.digest()
+
+        keys.append(key)
+        first.setdefault(key, index)
+        counts[key] = counts.get(key, 0) + 1
+
+    # Functions are numbered in the order they are first used
+    shared = {}
+    functions = []
+    for key, index in first.items():
+        if counts[key] > 1:
+            shared[key] = "W{}".format(len(shared) + 1)
+            times, slopes, intercepts = columns[index]
+            functions.append(".func " + shared[key] + "(t) {" + resistor_expression(
+                times.tolist(), slopes.tolist(), intercepts.tolist(), mode, variable="t") + "}")
+
+    return [shared.get(key) for key in keys], functions
+
+
+def breakpoint_segments(times, values):
+
+    """  
+    Calculates the line segments between the breakpoints of a single resistor
+
+    Returns a (times, slopes, intercepts) tuple of arrays in the same form as array_columns()
+    """
+
+    times, slopes, intercepts = process_resistor_array(np.column_stack((times, values)))
+
+    return times, slopes[:, 0], intercepts[:, 0]
+
+
+def resistor_expression(times, slopes, intercepts, mode="nested", variable="time"):
+
+    """  
+    Writes the resistance of a single resistor as a function of time in a format LTSpice can read.
+
+    Args:
+        times - the end time of each line segment
+        slopes, intercepts - m and c from y = m*x + c for each line segment
+        mode - one of:
+                 nested - one if statement per segment nested inside each other. Evaluated in linear time
+                 tree - if statements arranged as a balanced binary search on time. Evaluated in log time
+                 table - a table() lookup of the breakpoints. The most compact form
+        variable - name of the time variable, changed when the function is written as a .func
+
+    Returns the function as a string. The value after the last segment is held constant.
+    """
+
+    # Value at the end of the last segment which is held for the rest of the simulation
+    end = (times[-1] * slopes[-1]) + intercepts[-1]
+
+    if mode == "nested":
+        parts = ["".join(["If(", variable, " < ", str(time), ", ", str(m), " * ", variable, " + ", str(c), ", "])
+                 for time, m, c in zip(times, slopes, intercepts)]
+        return "".join(parts) + str(end) + ")" * len(times)
+
+    elif mode == "tree":
+        parts = []
+        _build_tree(times, slopes, intercepts, end, 0, len(times), parts, variable)
+        return "".join(parts)
+
+    elif mode == "table":
+        # Adds the start of the first segment at time 0 so the table matches the segments from the start
+        points = [] if times[0] <= 0 else ["0", str(intercepts[0])]
+        for time, m, c in zip(times, slopes, intercepts):
+            points.extend([str(time), str((time * m) + c)])
+        return "table(" + variable + ", " + ", ".join(points) + ")"
+
+    raise ValueError("Unknown resistor format: " + str(mode))
+
+
+def _build_tree(times, slopes, intercepts, end, low, high, parts, variable="time"):
+
+    """  
+    Adds a balanced tree of if statements covering segments low to high (inclusive) to parts.
+    Segment len(times) is the constant end value.
+    """
+
+    if low == high:
+        if low == len(times):
+            parts.append(str(end))
+        else:
+            parts.extend([str(slopes[low]), " * ", variable, " + ", str(intercepts[low])])
+        return
+
+    # Segments up to mid - 1 apply before the end time of segment mid - 1
+    mid = (low + high + 1) // 2
+    parts.extend(["If(", variable, " < ", str(times[mid - 1]), ", "])
+    _build_tree(times, slopes, intercepts, end, low, mid - 1, parts, variable)
+    parts.append(", ")
+    _build_tree(times, slopes, intercepts, end, mid, high, parts, variable)
+    parts.append(")")
 
 
 def setup(file):
@@ -291,29 +846,8 @@ def setup(file):
         for line in inpt:
             line = [x.strip() for x in line.split('=')]
 
-            if line[0] == "voltage":
-                v_type = [x.strip() for x in line[1].split(',')]
-
-                if v_type[0] == "const":
-                    s[0] = v_type[1]
-                
-                elif v_type[0] == "var":
-                    s[0] = "PWL( " + v_type[1] + ")"
-
-            elif line[0] == "parasitic resistance":
-                s[1] = line[1]
-            
-            elif line[0] == "time start":
-                s[2] = line[1]
-
-            elif line[0] == "time stop":
-                s[3] = line[1]
-            
-            elif line[0] == "time step":
-                s[4] = line[1]
-
-            elif line[0] == "compression":
-                s[5] = line[1]
+            if line[0] in SETUP_KEYS:
+                apply_setting(s, line[0], line[1])
 
     # Sets default values for parasitic resistance and compression
     if s[1] == "":
@@ -323,9 +857,55 @@ def setup(file):
 
     return s
 
+
+def apply_setting(s, key, value):
+
+    """  
+    Stores a single value from the setup file in the list returned by setup()
+
+    Args:
+        s - list of setup values, updated in place
+        key - name of the setting as written in the setup file e.g. time stop
+        value - value of the setting as written in the setup file
+    """
+
+    if key == "voltage":
+        v_type = [x.strip() for x in value.split(',')]
+
+        if v_type[0] == "const":
+            s[0] = v_type[1]
+
+        elif v_type[0] == "var":
+            s[0] = "PWL( " + v_type[1] + ")"
+
+        # The waveform stays in its file which LTSpice reads itself. The path is made absolute as LTSpice
+        # looks for files relative to the schematic
+        elif v_type[0] == "file":
+            path = os.path.abspath(value.split(',', 1)[1].strip())
+            s[0] = pwl_file(path)
+
+    elif key in SETUP_KEYS:
+        s[SETUP_KEYS.index(key)] = value
+
+    else:
+        raise ValueError("Unknown setting: " + str(key))
+
+
 # Only runs program if its called as a script
 if __name__ == '__main__':
     flag = True
+
+    # Takes the optional profiling flags out of the arguments, each is followed by a file name
+    profile = {"--profile": None, "--cprofile": None}
+    incremental = "--incremental" in argv
+    if incremental:
+        argv.remove("--incremental")
+    for option in profile:
+        if option in argv[:-1]:
+            index = argv.index(option)
+            profile[option] = argv.pop(index + 1)
+            argv.pop(index)
+
     # Checks for correct number of commandline arguments and prompts user if they arent given
     if len(argv) != 4:
         if len(argv) == 3:
@@ -335,15 +915,29 @@ if __name__ == '__main__':
             flag = False
             print("Incorrect arguments.")
             print("Run program using: python complex_generator.py [input file name as one word] [output file name as one word] [Optional Setup file name as one word]")
+            print("Add --profile report.json to save the time and memory of each stage and --cprofile stats.prof to also save cProfile stats")
+            print("Add --incremental to only rebuild the layers which changed since the last run")
 
     # Checks for the arguments having the correct file extensions
-    if argv[1][-4:] != ".csv" or argv[2][-4:] != ".asc" or argv[3][-4:] != ".txt":
+    if flag and (argv[1][-4:] not in (".csv", ".npy") or argv[2][-4:] not in (".asc", ".cir") or argv[3][-4:] != ".txt"):
         flag = False
-        print("Incorrect arguments. \nPlease make sure the specified files have the correct file extension\n\te.g. python complex_generator.py input.csv output.asc setup.txt")
+        print("Incorrect arguments. \nPlease make sure the specified files have the correct file extension\n\te.g. python complex_generator.py input.csv output.asc setup.txt\n\tor python complex_generator.py input.csv output.cir setup.txt")
 
     # Runs program only if tests have passed
-    if flag:
+    # Either flag profiles the run, the report is only saved when asked for
+    if flag and (profile["--profile"] is not None or profile["--cprofile"] is not None):
+        profiler = Profiler(stats_file=profile["--cprofile"])
+        with profiler:
+            reused = main(*argv[1:4], profiler=profiler, incremental=incremental)
+        if profile["--profile"] is not None:
+            profiler.save(profile["--profile"])
+        print(profiler.summary())
+
+    elif flag:
         # Runs main function if the program is run as a script
-        main(*argv[1:4])
+        reused = main(*argv[1:4], incremental=incremental)
+
+    else: print(argv)
 
-    else: print(argv)
\ No newline at end of file
+    if flag and incremental:
+        print("Reused {} layers from the previous output".format(reused))
\ No newline at end of file
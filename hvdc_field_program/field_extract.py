@@ -0,0 +1,178 @@
+##############################################################
+#   Finds the field in each layer at the times of interest   #
+#   from any number of simulation results                    #
+##############################################################
+
+# Results can be tab separated tables written by transient_solver.py or exported from LTSpice (.txt), simulator
+# output (.raw) or files converted by series_store.py (.npy). Each result's time column is sorted once and node
+# voltages are interpolated at the requested times with a binary search rather than by scanning the file.
+#
+# The summary has one row per result and time with the field in each layer in kV/mm:
+#     file, time, E1, E2, ..., En
+
+# Imports argv to get commandline arguments
+from sys import argv
+import csv
+import numpy as np
+from raw_reader import RawReader
+from series_store import load_series
+from resistance import read_config, layer_radii, layer_field
+
+
+class TimeIndex:
+
+    def __init__(self, times):
+        times = np.asarray(times, dtype=np.float64)
+
+        # Results are normally already in order so sorting is only done when needed
+        if np.all(times[1:] >= times[:-1]):
+            self.order = None
+            self.times = times
+        else:
+            self.order = np.argsort(times, kind="stable")
+            self.times = times[self.order]
+
+
+    def __len__(self):
+        return len(self.times)
+
+    def __repr__(self):
+        return "TimeIndex({} points)".format(len(self.times))
+
+
+    def weights(self, requested):
+
+        """
+        Finds the points either side of each requested time and how far between them it lies.
+        Times outside the result are clamped to the first or last point.
+
+        Returns a tuple of arrays (lower index, upper index, fraction of the way to the upper point)
+        """
+
+        requested = np.clip(np.asarray(requested, dtype=np.float64), self.times[0], self.times[-1])
+        upper = np.clip(np.searchsorted(self.times, requested, side="right"), 1, len(self.times) - 1)
+        lower = upper - 1
+
+        span = self.times[upper] - self.times[lower]
+        fraction = np.divide(requested - self.times[lower], span, out=np.zeros(len(requested)), where=span > 0)
+
+        if self.order is not None:
+            lower, upper = self.order[lower], self.order[upper]
+
+        return lower, upper, fraction
+
+
+    def interpolate(self, trace, requested):
+
+        """
+        Linearly interpolates a trace at the requested times. Only the points either side are read so memory
+        mapped traces are not loaded in full.
+        """
+
+        lower, upper, fraction = self.weights(requested)
+        trace = np.asarray(trace)
+
+        return trace[lower] * (1 - fraction) + trace[upper] * fraction
+
+
+def read_result(inpt_file):
+
+    """
+    Opens a result file
+
+    Returns a tuple (times, names, traces) where traces is a list of arrays in the same order as the names
+    """
+
+    if inpt_file[-4:] == ".raw":
+        raw = RawReader(inpt_file)
+        return raw.time, raw.names[1:], [raw.trace(x) for x in range(1, len(raw.names))]
+
+    if inpt_file[-4:] == ".npy":
+        header, table = load_series(inpt_file)
+        return table[:, 0], header["columns"][1:], [table[:, x] for x in range(1, table.shape[1])]
+
+    with open(inpt_file, "r") as inpt:
+        names = inpt.readline().split()
+    table = np.loadtxt(inpt_file, skiprows=1, ndmin=2)
+
+    return table[:, 0], names[1:], [table[:, x] for x in range(1, table.shape[1])]
+
+
+def node_traces(names, traces, layers):
+
+    """
+    Picks the voltage at the top of each layer, V(n001) downwards, from the traces of a result.
+    Schematics and netlists from complex_generator.py label the top of every layer with these names.
+    """
+
+    lowered = [x.lower() for x in names]
+    wanted = ["V(n{:03d})".format(x + 1) for x in range(layers)]
+
+    missing = [x for x in wanted if x.lower() not in lowered]
+    if missing:
+        raise ValueError("Result has no trace for " + ", ".join(missing[:5]) + (", ..." if len(missing) > 5 else "")
+                         + "\nMake sure the schematic was created by complex_generator.py")
+
+    return [traces[lowered.index(x.lower())] for x in wanted]
+
+
+def extract_fields(result_files, times, radii):
+
+    """
+    Calculates the field in each layer at each requested time for every result
+
+    Args:
+        result_files - list of result files
+        times - times of interest
+        radii - radius of each layer boundary in mm, see layer_radii()
+
+    Returns a tuple (file names, times, fields) of columns with one entry per result and time.
+    fields has one column per layer
+    """
+
+    layers = len(radii) - 1
+    times = np.asarray(times, dtype=np.float64)
+    files, fields = [], []
+
+    for result in result_files:
+        resultTimes, names, traces = read_result(result)
+        index = TimeIndex(resultTimes)
+
+        nodes = np.column_stack([index.interpolate(x, times) for x in node_traces(names, traces, layers)])
+        fields.append(layer_field(nodes, radii))
+        files.extend([result] * len(times))
+
+    return files, np.tile(times, len(result_files)), np.vstack(fields) if fields else np.zeros((0, layers))
+
+
+def write_summary(outpt_file, files, times, fields):
+
+    """
+    Saves the fields as a csv file with one row per result and time
+    """
+
+    with open(outpt_file, "w", newline="") as output:
+        writer = csv.writer(output, dialect="excel")
+        writer.writerow(["file", "time"] + ["E{}".format(x + 1) for x in range(fields.shape[1])])
+        for row in zip(files, times.tolist(), fields.tolist()):
+            writer.writerow([row[0], row[1]] + row[2])
+
+
+def extract(config_file, outpt_file, result_files):
+
+    """
+    Writes the field at the times of interest in the iteration config for each result file
+    """
+
+    config = read_config(config_file)
+    write_summary(outpt_file, *extract_fields(result_files, config["times"], layer_radii(config["radius"])))
+
+
+# Only runs program if its called as a script
+if __name__ == '__main__':
+    if len(argv) < 4 or argv[2][-4:] != ".csv":
+        print("Incorrect arguments.")
+        print("Run program using: python field_extract.py [iteration config file] [output file ending in .csv] [result files]")
+
+    else:
+        extract(argv[1], argv[2], argv[3:])
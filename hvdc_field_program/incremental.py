@@ -0,0 +1,189 @@
+##############################################################
+#   Reuses the text of layers which have not changed since   #
+#   the output file was last generated                       #
+##############################################################
+
+# Each layer of a schematic or netlist is written as one block of text. The fingerprint of a layer is a hash of
+# everything its text is made from: the line segments of its resistors, its capacitor values, its depth and the
+# settings of the whole file. Alongside the output an index file records the fingerprint and byte range of
+# every layer.
+#
+# When the file is generated again, layers whose fingerprint is unchanged are copied from the old file and only the
+# rest are built. The new file is written next to the old one and replaces it when done, so the old text can be
+# read while the new file is written. Byte ranges are counted from the text written rather than asking the file,
+# as asking flushes the write buffer every layer.
+#
+# The index is ignored when the output file has been changed since it was written or was made with other settings.
+
+import hashlib
+import json
+import os
+import numpy as np
+
+
+INDEX_VERSION = 1
+
+
+def index_file(outpt_file):
+    return outpt_file + ".index"
+
+
+def layer_fingerprints(columns, capacitorValues, settings, names=None):
+
+    """
+    Hashes everything that goes into the text of each layer
+
+    Args:
+        columns - list with a (times, slopes, intercepts) tuple of arrays for each resistor in the order of
+                  the input file
+        capacitorValues - table of capacitor values, one row per layer
+        settings - string of the settings which affect every layer
+        names - shared function used by each resistor as returned by shared_waveforms()
+
+    Returns a list of hex digests, one per layer
+    """
+
+    layers, sections = len(capacitorValues), len(capacitorValues[0])
+    fingerprints = []
+
+    for layer in range(layers):
+        digest = hashlib.sha1("{}|{}|{}|".format(settings, layer, capacitorValues[layer]).encode())
+
+        # Resistors in the input file go through every layer for the first section then every layer for the next
+        for section in range(sections):
+            index = section * layers + layer
+            if names is not None and names[index] is not None:
+                digest.update(names[index].encode())
+            else:
+                for values in columns[index]:
+                    digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+            digest.update(b"|")
+
+        fingerprints.append(digest.hexdigest())
+
+    return fingerprints
+
+
+class SectionIndex:
+
+    def __init__(self, outpt_file, fingerprints, settings):
+        self.outpt_file = outpt_file
+        self.temp_file = outpt_file + ".tmp"
+        self.fingerprints = fingerprints
+        self.settings = settings
+        self.ranges = [None] * len(fingerprints)
+        self.reused = 0
+        self._previous = {}
+        self._old = None
+        self._position = 0
+        self._encoding = None
+
+        self._load()
+
+
+    def __repr__(self):
+        return "SectionIndex({}, {} of {} reused)".format(self.outpt_file, self.reused, len(self.fingerprints))
+
+
+    def _load(self):
+
+        """
+        Reads the index of the previous output and opens it if it can be trusted
+        """
+
+        try:
+            with open(index_file(self.outpt_file), "r") as inpt:
+                index = json.load(inpt)
+            status = os.stat(self.outpt_file)
+        except (OSError, ValueError):
+            return
+
+        # A file edited since it was written can keep its size, so the modification time is checked as well
+        if index.get("version") != INDEX_VERSION or index.get("settings") != self.settings or \
+                index.get("size") != status.st_size or index.get("modified") != status.st_mtime_ns:
+            return
+
+        self._previous = {fingerprint: (start, length) for fingerprint, start, length in index["layers"]}
+        self._old = open(self.outpt_file, "rb")
+
+
+    def reusable(self, layer):
+        return self._old is not None and self.fingerprints[layer] in self._previous
+
+
+    def begin(self, output):
+
+        """
+        Notes where the first layer starts in the output, a file opened in text mode. Call before writing any layers.
+        """
+
+        self._position = output.tell()
+        self._encoding = output.encoding
+
+
+    def copy(self, layer, output):
+
+        """
+        Writes the old text of a layer to the output
+        """
+
+        start, length = self._previous[self.fingerprints[layer]]
+        self._old.seek(start)
+
+        # Written as text so it goes through the write buffer, newlines are translated back when written
+        output.write(self._old.read(length).decode(self._encoding).replace(os.linesep, "\n"))
+        self._advance(layer, length)
+        self.reused += 1
+
+
+    def add(self, layer, lines):
+
+        """
+        Records the text of a layer which was built and written to the output
+        """
+
+        self._advance(layer, len("".join(lines).replace("\n", os.linesep).encode(self._encoding)))
+
+
+    def _advance(self, layer, length):
+        self.ranges[layer] = (self._position, length)
+        self._position += length
+
+
+    def finish(self):
+
+        """
+        Replaces the old output with the new one and saves the index. Call once the new file is closed.
+
+        Returns the number of layers copied from the old output
+        """
+
+        if self._old is not None:
+            self._old.close()
+            self._old = None
+
+        os.replace(self.temp_file, self.outpt_file)
+
+        status = os.stat(self.outpt_file)
+        index = {"version": INDEX_VERSION, "settings": self.settings, "size": status.st_size,
+                 "modified": status.st_mtime_ns,
+                 "layers": [[fingerprint, start, length]
+                            for fingerprint, (start, length) in zip(self.fingerprints, self.ranges)]}
+        with open(index_file(self.outpt_file), "w") as output:
+            json.dump(index, output)
+
+        return self.reused
+
+
+    def abort(self):
+
+        """
+        Removes the unfinished output, leaving the old output and index as they were
+        """
+
+        if self._old is not None:
+            self._old.close()
+            self._old = None
+
+        if os.path.exists(self.temp_file):
+            os.remove(self.temp_file)
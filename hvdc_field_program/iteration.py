@@ -0,0 +1,171 @@
+##############################################################
+#   Repeats the field calculation until the field in each    #
+#   layer stops changing between iterations                  #
+##############################################################
+
+# Each iteration:
+#     1. Calculates the resistance of every section of every layer from its temperature and the field found in
+#        the previous iteration (zero field for the first iteration)
+#     2. Writes the resistances and capacitances as an input file for complex_generator.py
+#     3. Solves the model with the native solver. Data is saved from the time start of the setup file, or from the
+#        first time in the temperature data if that is earlier, so the field is known at every temperature time.
+#        With warm start on, every run after the first starts at the time start from the state the previous
+#        iteration reached there, skipping the time before it. The field before the time start is then only found in
+#        the first iteration, which is close enough when the field there is not saved. This only saves time when the
+#        time start is after 0. Runs can also reuse earlier time points
+#     4. Finds the field in each layer at each time in the temperature data from the node voltages
+#
+# Iterations stop once the largest change in field, relative to the largest field, is below the convergence
+# tolerance or the number of iterations in the config file is reached. The change after every iteration is saved.
+#
+# Resistances and fields are calculated by resistance.py. The field of the last iteration at the times of interest is
+# saved in a smaller csv file by field_extract.py
+
+# Imports argv to get commandline arguments
+from sys import argv
+import csv
+import time
+import numpy as np
+from complex_generator import setup, process_resistor_array
+from transient_solver import solve_transient, write_results, parse_value
+from resistance import read_config, read_inputs, layer_field, resistance_table, write_input
+from field_extract import extract_fields, write_summary
+from profiler import NULL_PROFILER
+from timestep import read_schedule, plan_steps
+
+
+def max_change(new, old):
+
+    """
+    Largest change between two arrays relative to the largest value in the new array
+    """
+
+    scale = np.max(np.abs(new))
+
+    return float(np.max(np.abs(new - old)) / scale) if scale > 0 else 0.0
+
+
+def run_iterations(config_file="config/iteration_config.txt", setup_file="config/generator_config.txt",
+                   tolerance=None, max_iterations=None, warm_start=None, reuse_grid=None, progress=None,
+                   profiler=NULL_PROFILER):
+
+    """
+    Runs the iteration loop until the field converges
+
+    Args:
+        config_file - iteration config file
+        setup_file - generator setup file used for every simulation
+        tolerance, max_iterations - override the values in the config file
+        warm_start - start each run at the time start of the setup file from the node and capacitor voltages the
+                     previous iteration reached there instead of solving from time 0. Does nothing when the time
+                     start is 0
+        reuse_grid - step through the time points of the previous iteration. Only used when data is saved
+                     from time 0 or with warm start so the whole run is known
+        progress - called after each iteration with its history entry and the maximum number of iterations.
+                   The field change is printed instead when it is left out
+        profiler - records the time of each stage of every iteration, see profiler.py
+
+    Returns the convergence history, a list with a dictionary for each iteration
+    """
+
+    config = read_config(config_file)
+    tolerance = config["tolerance"] if tolerance is None else tolerance
+    max_iterations = config["iterations"] if max_iterations is None else max_iterations
+    warm_start = config["warmStart"] if warm_start is None else warm_start
+    reuse_grid = config["reuseGrid"] if reuse_grid is None else reuse_grid
+
+    setupValues = setup(setup_file)
+    v_string, parasiticResistance, timeStart, timeStop, timeStep, _ = setupValues
+    capacitorValues, temperatures, radii = read_inputs(config)
+
+    # Every iteration has resistances at the times of the temperature data so the schedule is planned once
+    grid, _ = plan_steps(setupValues, read_schedule(setup_file), temperatures[:, 0])
+
+    # The field is needed at every time in the temperature data, including any before the time start
+    saveStart = min(parse_value(timeStart), temperatures[0, 0])
+
+    field = np.zeros((temperatures.shape[0], len(radii) - 1))
+    resistances = None
+    state = None
+    history = []
+
+    for iteration in range(1, max_iterations + 1):
+        start = time.perf_counter()
+        name = config["outputFileName"].format(iteration)
+
+        with profiler.stage("resistances"):
+            newResistances = resistance_table(temperatures, field, radii, config["resistivity"], config["alpha"],
+                                              config["gamma"])
+            write_input(name + ".csv", capacitorValues, newResistances)
+
+        with profiler.stage("solve"):
+            times, voltages, newState = solve_transient(capacitorValues, process_resistor_array(newResistances),
+                                                        v_string, parasiticResistance, timeStop, timeStep, saveStart,
+                                                        state, grid, keep_state=True, state_time=timeStart)
+            write_results(name + ".txt", times, voltages)
+
+        # The next run starts at the first saved time from the state this run reached there
+        if warm_start:
+            state = newState
+        if reuse_grid and (saveStart == 0 or warm_start):
+            grid = times
+
+        # Field at each time in the temperature data. Times before a warm started run keep the field found earlier
+        with profiler.stage("field"):
+            solved = temperatures[:, 0] >= times[0]
+            nodes = np.column_stack([np.interp(temperatures[solved, 0], times, voltages[:, x])
+                                     for x in range(voltages.shape[1])])
+            newField = field.copy()
+            newField[solved] = layer_field(nodes, radii)
+
+        history.append({
+            "iteration": iteration,
+            "field change": max_change(newField, field),
+            "resistance change": None if resistances is None else max_change(newResistances[:, 1:],
+                                                                             resistances[:, 1:]),
+            "steps": len(times) - 1,
+            "seconds": time.perf_counter() - start
+        })
+        if progress is None:
+            print("Iteration {}: field change {:.3e}".format(iteration, history[-1]["field change"]))
+        else:
+            progress(history[-1], max_iterations)
+
+        field, resistances = newField, newResistances
+
+        # The first iteration always changes the field from zero so at least two are needed
+        if iteration > 1 and history[-1]["field change"] < tolerance:
+            break
+
+    write_history(config["outputFileName"].format("convergence") + ".csv", history)
+
+    # Field of the final iteration at the times of interest
+    if config["times"]:
+        write_summary(config["outputFileName"].format("fields") + ".csv",
+                      *extract_fields([name + ".txt"], config["times"], radii))
+
+    return history
+
+
+def write_history(outpt_file, history):
+
+    """
+    Saves the convergence history as a csv file
+    """
+
+    with open(outpt_file, "w", newline="") as output:
+        writer = csv.DictWriter(output, fieldnames=["iteration", "field change", "resistance change", "steps",
+                                                         "seconds"],
+                                dialect="excel")
+        writer.writeheader()
+        writer.writerows(history)
+
+
+# Only runs program if its called as a script
+if __name__ == '__main__':
+    if len(argv) > 3:
+        print("Incorrect arguments.")
+        print("Run program using: python iteration.py [Optional iteration config file] [Optional setup file]")
+
+    else:
+        run_iterations(*argv[1:])
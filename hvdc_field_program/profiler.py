@@ -0,0 +1,202 @@
+##############################################################
+#   Records how long each stage of a generation takes and    #
+#   how much memory and output it creates                    #
+##############################################################
+
+# Code to be measured is wrapped in a named stage:
+#     with profiler.stage("read"):
+#         ...
+# Each stage records its total wall time, the number of times it was entered, the bytes it reports writing and
+# the most memory held by python while it ran. Stages should not be nested as measuring the memory of an
+# inner stage resets the peak of the outer one.
+#
+# NullProfiler has the same methods but does nothing so instrumented code costs almost nothing when profiling
+# is off. Giving a stats file to Profiler also runs cProfile over the whole generation.
+#
+# Using a profiler in a with block starts it and makes sure it is stopped even if the code raises, so memory
+# tracing and cProfile are never left running.
+
+import cProfile
+import json
+import time
+import tracemalloc
+
+
+class _NullStage:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class NullProfiler:
+
+    enabled = False
+    _stage = _NullStage()
+
+    def __repr__(self):
+        return "NullProfiler()"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def stage(self, name):
+        return self._stage
+
+    def add_bytes(self, name, count):
+        pass
+
+
+class _Stage:
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        if self.profiler.memory:
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        seconds = time.perf_counter() - self.start
+        record = self.profiler._record(self.name)
+        record["seconds"] += seconds
+        record["calls"] += 1
+
+        if self.profiler.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            record["peak bytes"] = max(record["peak bytes"], peak)
+
+        return False
+
+
+class Profiler:
+
+    enabled = True
+
+    def __init__(self, memory=True, stats_file=None):
+        self.memory = memory
+        self.stats_file = stats_file
+        self.stages = {}
+        self.seconds = 0.0
+        self._profile = None
+        self._started = None
+        self._tracing = False
+
+
+    def __repr__(self):
+        return "Profiler({} stages)".format(len(self.stages))
+
+
+    def __enter__(self):
+        self.start()
+        return self
+
+
+    def __exit__(self, *args):
+        self.stop()
+        return False
+
+
+    def start(self):
+
+        """
+        Starts measuring the whole run, memory tracing and cProfile if a stats file was given
+        """
+
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+
+        if self.stats_file is not None:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+        self._started = time.perf_counter()
+
+
+    def stop(self):
+
+        """
+        Stops measuring and writes the cProfile stats file if one was given
+        """
+
+        self.seconds += time.perf_counter() - self._started
+
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.stats_file)
+            self._profile = None
+
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+
+    def add_bytes(self, name, count):
+        self._record(name)["bytes"] += count
+
+
+    def _record(self, name):
+        if name not in self.stages:
+            self.stages[name] = {"seconds": 0.0, "calls": 0, "bytes": 0, "peak bytes": 0}
+
+        return self.stages[name]
+
+
+    def report(self):
+
+        """
+        Returns the measurements as a dictionary. Time not spent in any stage is listed as other
+        """
+
+        staged = sum(x["seconds"] for x in self.stages.values())
+
+        return {"seconds": self.seconds, "other seconds": max(self.seconds - staged, 0.0), "stages": self.stages,
+                "stats file": self.stats_file}
+
+
+    def save(self, outpt_file):
+
+        """
+        Writes the report as a JSON file
+        """
+
+        with open(outpt_file, "w") as output:
+            json.dump(self.report(), output, indent=4)
+
+
+    def summary(self):
+
+        """
+        Returns the report as a table for printing
+        """
+
+        lines = ["{:<18}{:>10}{:>8}{:>14}{:>14}".format("stage", "seconds", "calls", "bytes", "peak bytes")]
+        for name, record in self.stages.items():
+            lines.append("{:<18}{:>10.3f}{:>8}{:>14,}{:>14,}".format(name, record["seconds"], record["calls"],
+                                                                     record["bytes"], record["peak bytes"]))
+        lines.append("{:<18}{:>10.3f}".format("total", self.seconds))
+
+        return "\n".join(lines)
+
+
+# Shared instance used when profiling is off
+NULL_PROFILER = NullProfiler()
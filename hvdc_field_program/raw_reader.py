@@ -0,0 +1,120 @@
+##############################################################
+#   Reads binary .raw files written by LTSpice or ngspice    #
+#   without loading the data into memory                     #
+##############################################################
+
+# The header is plain text (UTF-16 for LTSpice, ASCII for ngspice) ending in a line reading Binary:
+# Everything after it is the data which is memory mapped so traces are only read from disk when used.
+#
+# LTSpice transient files store time as a float64 and every other trace as a float32 unless the double flag
+# is set. ngspice stores everything as float64. The layout is worked out from the size of the data block.
+# Files saved with the fastaccess flag hold each trace in one block rather than one point at a time.
+
+import os
+import numpy as np
+
+
+class RawReader:
+
+    def __init__(self, file):
+        self.file = file
+        self.header = {}
+        self.names = []
+
+        with open(file, "rb") as inpt:
+            start = inpt.read(4)
+        # UTF-16 text has a zero byte after every ASCII character
+        encoding = "utf-16-le" if start[1:2] == b"\x00" else "ascii"
+        marker = "Binary:".encode(encoding)
+        newline = "\n".encode(encoding)
+
+        # Reads in blocks until the end of the header is found
+        with open(file, "rb") as inpt:
+            data = b""
+            while marker not in data or newline not in data[data.index(marker):]:
+                block = inpt.read(1 << 16)
+                if block == b"":
+                    raise ValueError("No binary data found in " + file)
+                data += block
+
+        # Data starts after the end of the marker line
+        offset = data.index(newline, data.index(marker)) + len(newline)
+        self._parse_header(data[:offset].decode(encoding))
+
+        points = int(self.header["No. Points"])
+        flags = self.header.get("Flags", "").split()
+        size = os.path.getsize(file) - offset
+
+        # Picks the number format which matches the size of the data block
+        if "double" in flags or size == points * len(self.names) * 8:
+            formats = ["<f8"] * len(self.names)
+        else:
+            formats = ["<f8"] + ["<f4"] * (len(self.names) - 1)
+
+        if "fastaccess" in flags:
+            # One block per trace
+            self._traces = []
+            for fmt in formats:
+                self._traces.append(np.memmap(file, dtype=fmt, mode="r", offset=offset, shape=(points,)))
+                offset += points * np.dtype(fmt).itemsize
+        else:
+            # One record per point holding every trace
+            record = np.dtype([("v{}".format(x), fmt) for x, fmt in enumerate(formats)])
+            data = np.memmap(file, dtype=record, mode="r", offset=offset, shape=(points,))
+            self._traces = [data["v{}".format(x)] for x in range(len(formats))]
+
+        # LTSpice marks some points by making the time negative
+        self.time = np.abs(self._traces[0])
+
+
+    def __len__(self):
+        return len(self.time)
+
+    def __repr__(self):
+        return "RawReader({})".format(self.file)
+
+
+    def _parse_header(self, text):
+
+        """
+        Stores the header fields and the names of the traces
+        """
+
+        variables = False
+        for line in text.splitlines():
+            if variables and line.startswith(("\t", " ")):
+                # Lines are index, name, type
+                self.names.append(line.split()[1])
+                continue
+
+            key, _, value = line.partition(":")
+            self.header[key.strip()] = value.strip()
+            variables = key.strip() == "Variables"
+
+
+    def trace(self, name):
+
+        """
+        Returns the values of a trace as a memory mapped array
+
+        Args:
+            name - name of the trace e.g. V(n001) or its index
+        """
+
+        index = name if isinstance(name, int) else self.names.index(name)
+        if index == 0:
+            return self.time
+
+        return self._traces[index]
+
+
+    def time_range(self, start=None, stop=None):
+
+        """
+        Returns a slice selecting the points with times between start and stop inclusive
+        """
+
+        first = 0 if start is None else int(np.searchsorted(self.time, start, side="left"))
+        last = len(self.time) if stop is None else int(np.searchsorted(self.time, stop, side="right"))
+
+        return slice(first, last)
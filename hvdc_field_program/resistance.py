@@ -0,0 +1,242 @@
+##############################################################
+#   Calculates the resistance of every section of every      #
+#   layer from temperature and field data                    #
+##############################################################
+
+# Resistivity follows rho = rho0 * exp(-alpha * T - gamma * E) with T in degrees C and E in kV/mm.
+# Each layer is a cylindrical shell so R = rho * ln(r_out / r_in) / (2 * pi) for one metre of cable.
+#
+# The whole time x layer x section table is calculated at once and can be written as an input file for
+# complex_generator.py or passed straight to the generator and solver without writing a file.
+
+# Imports argv to get commandline arguments
+from sys import argv
+import csv
+import numpy as np
+from complex_generator import read_data, read_arrays, setup, write_output
+from transient_solver import parse_value
+
+
+# Names of the settings in the iteration config file
+CONFIG_KEYS = ("temperature data csv", "output file name format", "number of iterations", "convergence tolerance",
+               "warm start", "reuse time grid", "radius data", "resistivty data",
+               "temperature coefficient of resistivity data", "gamma", "capacitances", "times")
+
+# Settings which change the resistances calculated from the config
+RESISTANCE_KEYS = ("radius data", "resistivty data", "temperature coefficient of resistivity data", "gamma")
+
+
+def read_config(file):
+
+    """
+    Extracts the values from the iteration config file
+
+    Returns a dictionary of the values converted to numbers where needed
+    """
+
+    config = {"iterations": 1, "tolerance": 1e-3, "times": [], "warmStart": False, "reuseGrid": False}
+
+    with open(file, "r") as inpt:
+        for line in inpt:
+            line = [x.strip() for x in line.split('=')]
+
+            if line[0] in CONFIG_KEYS:
+                apply_config(config, line[0], line[1])
+
+    return config
+
+
+def apply_config(config, key, value):
+
+    """
+    Stores a single value from the iteration config file in the dictionary returned by read_config()
+
+    Args:
+        config - dictionary of config values, updated in place
+        key - name of the setting as written in the config file e.g. gamma
+        value - value of the setting as written in the config file
+    """
+
+    if key == "temperature data csv":
+        config["tempdata"] = value
+    elif key == "output file name format":
+        config["outputFileName"] = value
+    elif key == "number of iterations":
+        config["iterations"] = int(value)
+    elif key == "convergence tolerance":
+        config["tolerance"] = float(value)
+    elif key == "warm start":
+        config["warmStart"] = value.lower() in ("true", "yes", "1")
+    elif key == "reuse time grid":
+        config["reuseGrid"] = value.lower() in ("true", "yes", "1")
+    elif key == "radius data":
+        config["radius"] = [float(x) for x in value.split(',')]
+    elif key == "resistivty data":
+        config["resistivity"] = [parse_value(x) for x in value.split(',')]
+    elif key == "temperature coefficient of resistivity data":
+        config["alpha"] = [float(x) for x in value.split(',')]
+    elif key == "gamma":
+        config["gamma"] = float(value)
+    elif key == "capacitances":
+        config["capacitance"] = value
+    elif key == "times":
+        config["times"] = [parse_value(x) for x in value.split(',') if x.strip() != ""]
+    else:
+        raise ValueError("Unknown setting: " + str(key))
+
+
+def layer_radii(radius):
+
+    """
+    Converts the radius data (start, stop, difference) into the radius of each layer boundary
+
+    Returns an array with one more value than there are layers
+    """
+
+    start, stop, step = radius
+    layers = int(round((stop - start) / step))
+
+    return start + step * np.arange(layers + 1)
+
+
+def layer_field(voltages, radii):
+
+    """
+    Calculates the average field in each layer from the voltages at the top of each layer
+
+    Args:
+        voltages - array with one column per layer boundary, the bottom of the stack being ground
+        radii - radius of each layer boundary in mm
+
+    Returns an array of fields in kV/mm with one column per layer
+    """
+
+    drops = voltages - np.append(voltages[..., 1:], np.zeros(voltages.shape[:-1] + (1,)), axis=-1)
+
+    return drops / 1000 / np.diff(radii)
+
+
+def resistance_table(temperatures, field, radii, resistivity, alpha, gamma):
+
+    """
+    Calculates the resistance of every resistor at each time in the temperature data
+
+    Args:
+        temperatures - 2D array where the first column is time and the rest are the temperature of each layer
+        field - array of the field in each layer at each time in kV/mm
+        radii - radius of each layer boundary
+        resistivity, alpha - resistivity and temperature coefficient of each section. Either one value per
+                             section or a sections x layers table for values which change between layers
+        gamma - field dependence of resistivity
+
+    Returns a 2D array in the layout read by complex_generator.py, time then (S1R1 -> SnR1) -> (S1Rm -> SnRm)
+    """
+
+    times = temperatures[:, 0]
+    geometry = np.log(radii[1:] / radii[:-1]) / (2 * np.pi)
+    layers = len(geometry)
+    if temperatures.shape[1] - 1 != layers or np.shape(field) != (len(times), layers):
+        raise ValueError("Temperature and field data must have one column per layer")
+
+    # Values per section, optionally per layer, are shaped to broadcast against a time x layer array
+    rho = np.asarray(resistivity, dtype=np.float64).reshape(-1, 1, np.size(resistivity) // len(resistivity))
+    a = np.asarray(alpha, dtype=np.float64).reshape(-1, 1, np.size(alpha) // len(alpha))
+    sections = rho.shape[0]
+
+    # sections x time x layers in one pass, resistivity falls with the strength of the field whatever its polarity
+    values = rho * np.exp(-a * temperatures[None, :, 1:] - gamma * np.abs(field)[None]) * geometry
+
+    table = np.empty((len(times), 1 + sections * layers))
+    table[:, 0] = times
+    # Columns are grouped by section, layer changing fastest
+    table[:, 1:] = values.transpose(1, 0, 2).reshape(len(times), sections * layers)
+
+    return table
+
+
+def write_input(outpt_file, capacitorValues, table):
+
+    """
+    Writes capacitances and a resistance table as an input file for complex_generator.py
+    """
+
+    layers = len(capacitorValues)
+    sections = (table.shape[1] - 1) // layers
+
+    with open(outpt_file, "w", newline="") as output:
+        writer = csv.writer(output, dialect="excel")
+        writer.writerow(["C{}".format(x + 1) for x in range(sections)])
+        writer.writerows(capacitorValues)
+        writer.writerow(["Time"] + ["S{}R{}".format(l + 1, s + 1) for s in range(sections) for l in range(layers)])
+        writer.writerows(table.tolist())
+
+
+def read_inputs(config):
+
+    """
+    Reads the capacitance and temperature files named in the iteration config
+
+    Args:
+        config - dictionary as returned by read_config()
+
+    Returns a tuple (capacitor values, temperature table, layer radii)
+    """
+
+    capacitorValues = read_data(config["capacitance"])[0]
+    temperatures = read_arrays(config["tempdata"])[1]
+
+    return capacitorValues, temperatures, layer_radii(config["radius"])
+
+
+def build_inputs(config_file, field=None):
+
+    """
+    Calculates the generator inputs described by an iteration config file
+
+    Args:
+        config_file - iteration config file
+        field - field in each layer at each time in the temperature data in kV/mm. Defaults to no field
+
+    Returns a tuple (capacitor values, resistance table) in the same form as read_arrays() in complex_generator.py
+    """
+
+    config = read_config(config_file)
+    capacitorValues, temperatures, radii = read_inputs(config)
+
+    return capacitorValues, config_table(config, temperatures, radii, field)
+
+
+def config_table(config, temperatures, radii, field=None):
+
+    """
+    Calculates the resistance table from the material values in a config and temperature data that has already
+    been read, see resistance_table()
+
+    Args:
+        config - dictionary as returned by read_config()
+        temperatures, radii - as returned by read_inputs()
+        field - field in each layer at each time in the temperature data in kV/mm. Defaults to no field
+
+    Returns the resistance table
+    """
+
+    if field is None:
+        field = np.zeros((temperatures.shape[0], len(radii) - 1))
+
+    return resistance_table(temperatures, field, radii, config["resistivity"], config["alpha"], config["gamma"])
+
+
+# Only runs program if its called as a script
+if __name__ == '__main__':
+    if len(argv) not in (3, 4) or argv[2][-4:] not in (".csv", ".asc", ".cir"):
+        print("Incorrect arguments.")
+        print("Run program using: python resistance.py [iteration config file] [output file ending in .csv, .asc or .cir] [Optional setup file]")
+
+    else:
+        capacitorValues, table = build_inputs(argv[1])
+
+        # Schematics are generated straight from the table without writing an input file
+        if argv[2][-4:] == ".csv":
+            write_input(argv[2], capacitorValues, table)
+        else:
+            write_output(argv[2], capacitorValues, table, setup(argv[3] if len(argv) == 4 else "config/generator_config.txt"))
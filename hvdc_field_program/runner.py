@@ -0,0 +1,212 @@
+##############################################################
+#   Runs simulations in batch mode as subprocesses instead   #
+#   of driving the LTSpice window with mouse clicks          #
+##############################################################
+
+# A runner takes a backend which knows how to start one simulator and a limit on how many run at once.
+# Jobs are queued and handed to the simulators as they become free. Each job can time out and be retried.
+#
+# Backends:
+#     LTSpiceBackend - LTSpice in batch mode. The executable defaults to the one in config/coord.txt
+#     NativeBackend - transient_solver.py. Takes the generator input csv and setup file instead of a netlist
+#     FakeBackend - copies canned output to the output file so the pipeline can be run without a simulator
+#
+# The netlists written by complex_generator.py use LTSpice only syntax such as Rser, startup and If() so other
+# simulators like ngspice can't run them.
+
+# Imports argv to get commandline arguments
+from sys import argv, executable
+from concurrent.futures import ThreadPoolExecutor
+import os
+import shutil
+import subprocess
+import time
+
+
+class Backend:
+
+    def command(self, inpt_file, outpt_file, setup_file=None):
+        raise NotImplementedError
+
+
+    def run(self, inpt_file, outpt_file, setup_file=None, timeout=None):
+
+        """
+        Runs a single simulation and waits for it to finish.
+        Raises subprocess.CalledProcessError if the simulator fails or subprocess.TimeoutExpired if it takes
+        longer than the timeout.
+        """
+
+        subprocess.run(self.command(inpt_file, outpt_file, setup_file), timeout=timeout, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+class LTSpiceBackend(Backend):
+
+    def __init__(self, program=None, coord_file="config/coord.txt"):
+        # Executable can be given as a list e.g. ["wine", "XVIIx64.exe"]
+        if program is None:
+            with open(coord_file, "r") as inpt:
+                program = inpt.readline().strip().replace("'", "")
+
+        self.program = [program] if isinstance(program, str) else list(program)
+
+
+    def __repr__(self):
+        return "LTSpiceBackend({})".format(" ".join(self.program))
+
+
+    def command(self, inpt_file, outpt_file, setup_file=None):
+        return self.program + ["-b", "-Run", inpt_file]
+
+
+    def run(self, inpt_file, outpt_file, setup_file=None, timeout=None):
+        Backend.run(self, inpt_file, outpt_file, setup_file, timeout)
+
+        # LTSpice always writes its results next to the input file
+        raw = os.path.splitext(inpt_file)[0] + ".raw"
+        if os.path.abspath(raw) != os.path.abspath(outpt_file):
+            shutil.move(raw, outpt_file)
+
+
+class NativeBackend(Backend):
+
+    def __repr__(self):
+        return "NativeBackend()"
+
+
+    def command(self, inpt_file, outpt_file, setup_file=None):
+        solver = os.path.join(os.path.dirname(os.path.abspath(__file__)), "transient_solver.py")
+        setup_file = "config/generator_config.txt" if setup_file is None else setup_file
+
+        return [executable, solver, inpt_file, outpt_file, setup_file]
+
+
+class FakeBackend(Backend):
+
+    def __init__(self, canned_file=None, delay=0, failures=0):
+        self.canned_file = canned_file
+        self.delay = delay
+        # Number of calls which fail before it starts succeeding
+        self.failures = failures
+        self.calls = []
+
+
+    def __repr__(self):
+        return "FakeBackend({})".format(self.canned_file)
+
+
+    def run(self, inpt_file, outpt_file, setup_file=None, timeout=None):
+        self.calls.append(inpt_file)
+
+        # Behaves like a simulator which hangs or crashes so timeouts and retries can be tried out
+        if timeout is not None and self.delay > timeout:
+            time.sleep(timeout)
+            raise subprocess.TimeoutExpired(["fake", inpt_file], timeout)
+        time.sleep(self.delay)
+
+        if len(self.calls) <= self.failures:
+            raise subprocess.CalledProcessError(1, ["fake", inpt_file], stderr=b"Simulated failure")
+
+        if self.canned_file is None:
+            with open(outpt_file, "w") as output:
+                output.write("time\tV(n001)\n0\t0\n")
+        else:
+            shutil.copyfile(self.canned_file, outpt_file)
+
+
+class SimulationRunner:
+
+    def __init__(self, backend, max_workers=2, timeout=None, retries=0):
+        self.backend = backend
+        self.timeout = timeout
+        self.retries = retries
+        # Threads only wait on the simulator processes so the pool size is the number of simulators at once
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+
+
+    def __repr__(self):
+        return "SimulationRunner({})".format(self.backend)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+
+    def submit(self, inpt_file, outpt_file, setup_file=None):
+
+        """
+        Queues a simulation
+
+        Returns a future which gives the result dictionary of the job, see _run()
+        """
+
+        return self._pool.submit(self._run, inpt_file, outpt_file, setup_file)
+
+
+    def run_all(self, jobs):
+
+        """
+        Runs a list of jobs and waits for all of them to finish
+
+        Args:
+            jobs - list of (input file, output file) or (input file, output file, setup file) tuples
+
+        Returns a list of result dictionaries in the same order as the jobs
+        """
+
+        futures = [self.submit(*job) for job in jobs]
+
+        return [future.result() for future in futures]
+
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+
+    def _run(self, inpt_file, outpt_file, setup_file):
+
+        """
+        Runs a single job, retrying it if it fails
+
+        Returns a dictionary of the input and output files, number of attempts, time taken and the error of the
+        last attempt if every attempt failed
+        """
+
+        start = time.perf_counter()
+        error = None
+
+        for attempt in range(1, self.retries + 2):
+            try:
+                self.backend.run(inpt_file, outpt_file, setup_file, self.timeout)
+                error = None
+                break
+
+            except subprocess.TimeoutExpired:
+                error = "Timed out after {}s".format(self.timeout)
+
+            except subprocess.CalledProcessError as e:
+                error = "Exit code {}: {}".format(e.returncode, (e.stderr or b"").decode(errors="replace").strip())
+
+            except OSError as e:
+                error = str(e)
+
+        return {"input": inpt_file, "output": outpt_file, "attempts": attempt, "error": error,
+                "seconds": time.perf_counter() - start}
+
+
+# Only runs program if its called as a script
+if __name__ == '__main__':
+    backends = {"ltspice": LTSpiceBackend, "native": NativeBackend}
+
+    if len(argv) < 3 or argv[1] not in backends:
+        print("Incorrect arguments.")
+        print("Run program using: python runner.py [ltspice or native] [input files]")
+
+    else:
+        with SimulationRunner(backends[argv[1]]()) as runner:
+            extension = ".txt" if argv[1] == "native" else ".raw"
+            for result in runner.run_all([(x, os.path.splitext(x)[0] + extension) for x in argv[2:]]):
+                print(result)
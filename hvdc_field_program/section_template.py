@@ -0,0 +1,132 @@
+##############################################################
+#   Renders the text of a section from a template compiled   #
+#   once instead of building every section from scratch      #
+##############################################################
+
+# Sections only differ by their values and by coordinates and names which move a fixed amount with depth.
+# The template is compiled by building a section with marker values at depths 0 and 1. Text that is the same in
+# both is kept as it is, numbers that change become linear in depth and the markers become value slots. The result
+# is a single format string so rendering a section is one call that fills in the values and shifted numbers.
+#
+# The template is checked against a third depth when compiled and against the first real section it renders.
+# Section layouts which do not fit the pattern fall back to TemplateBuilder.
+
+import re
+from templatebuilder import TemplateBuilder
+
+
+# Signed whole numbers, decimals are split into two numbers which do not change with depth
+_NUMBER = re.compile(r"(-?\d+)")
+
+# Templates compiled so far by number of values, None where the layout could not be compiled
+_templates = {}
+
+
+def _marker(index):
+
+    """
+    Unique placeholder for a value, made of letters so it is never mistaken for a number
+    """
+
+    letters = ""
+    while True:
+        letters = chr(97 + index % 26) + letters
+        index //= 26
+        if index == 0:
+            return "\x00" + letters + "\x00"
+
+
+class SectionTemplate:
+
+    def __init__(self, count):
+        self.count = count
+        self.checked = False
+
+        markers = [_marker(x) for x in range(count)]
+        first = _NUMBER.split("".join(TemplateBuilder(markers, 0).build_section()))
+        second = _NUMBER.split("".join(TemplateBuilder(markers, 1).build_section()))
+
+        if len(first) != len(second) or first[0::2] != second[0::2]:
+            raise ValueError("Section layout changes with depth")
+
+        # Splitting leaves text at even positions and numbers at odd positions
+        parts = []
+        bases, steps = [], []
+        for index, text in enumerate(first):
+            if index % 2 == 0:
+                text = text.replace("{", "{{").replace("}", "}}")
+                for x, marker in enumerate(markers):
+                    text = text.replace(marker, "{1[" + str(x) + "]}")
+                parts.append(text)
+
+            else:
+                # Numbers written with leading zeros keep their width
+                width = len(text) if text[0] == "0" and len(text) > 1 else 0
+                parts.append("{0[" + str(len(bases)) + "]" + (":0{}d".format(width) if width else "") + "}")
+                bases.append(int(text))
+                steps.append(int(second[index]) - int(text))
+
+        self.format = "".join(parts)
+        self.bases = bases
+        self.steps = steps
+
+        if self.render(markers, 2)[0] != "".join(TemplateBuilder(markers, 2).build_section()):
+            raise ValueError("Section coordinates are not linear in depth")
+
+
+    def __repr__(self):
+        return "SectionTemplate({} values, {} numbers)".format(self.count, len(self.bases))
+
+
+    def render(self, values, depth):
+
+        """
+        Creates the text of a single section, see create_section_text() in complex_generator.py
+
+        Returns a list holding the text of the section as one string
+        """
+
+        numbers = [base + depth * step for base, step in zip(self.bases, self.steps)]
+
+        return [self.format.format(numbers, values)]
+
+
+def section_template(count):
+
+    """
+    Returns the compiled template for sections with a number of values, or None if the layout can't be compiled
+    """
+
+    if count not in _templates:
+        try:
+            _templates[count] = SectionTemplate(count)
+        # Any layout the builder can't create from marker values is left to the builder
+        except Exception:
+            _templates[count] = None
+
+    return _templates[count]
+
+
+def render_section(values, depth):
+
+    """
+    Creates the text of a section from the compiled template if there is one, otherwise with TemplateBuilder.
+    The first section rendered from each template is also built to make sure they match.
+
+    Returns a list of strings
+    """
+
+    template = section_template(len(values))
+    if template is None:
+        return TemplateBuilder(values, depth).build_section()
+
+    lines = template.render(values, depth)
+
+    if not template.checked:
+        built = TemplateBuilder(values, depth).build_section()
+        if lines[0] != "".join(built):
+            _templates[len(values)] = None
+            return built
+        template.checked = True
+
+    return lines
@@ -0,0 +1,139 @@
+##############################################################
+#   Converts csv time series into a binary format which can  #
+#   be memory mapped instead of parsed on every read         #
+##############################################################
+
+# A converted table is stored as two files:
+#     name.npy  - float64 array with one column per series, first column is time. Stored column by column so
+#                 each column is contiguous on disk
+#     name.json - header listing the column names, the number of layers and sections and any capacitor values
+#
+# Works with the generator input file, time-temperature files and tab separated result tables.
+# Any rows between the first and second header rows are kept as capacitor values and everything after the
+# last header row is the table. Files with no header rows are all table.
+
+# Imports argv to get commandline arguments
+from sys import argv
+import csv
+import json
+import numpy as np
+
+
+def convert(inpt_file, outpt_file, layers=None):
+
+    """
+    Converts a csv or tab separated file into the binary format. Only needs to be done once per file.
+
+    Args:
+        inpt_file - file to convert
+        outpt_file - name of the .npy file to create. The header is saved next to it with a .json ending
+        layers - number of layers in the model. Defaults to the number of capacitor rows, or the number of
+                 series for files without capacitors
+
+    Returns the header as a dictionary
+    """
+
+    if outpt_file[-4:] != ".npy":
+        raise ValueError("Incorrect File types")
+
+    capacitorValues, names, table = read_table(inpt_file)
+
+    if layers is None:
+        layers = len(capacitorValues) if capacitorValues else table.shape[1] - 1
+
+    header = {
+        "source": inpt_file,
+        "columns": names if names else ["time"] + ["V{}".format(x + 1) for x in range(table.shape[1] - 1)],
+        "layers": layers,
+        "sections": (table.shape[1] - 1) // layers if layers else 0,
+        "capacitors": capacitorValues,
+        "rows": table.shape[0]
+    }
+
+    # Stored in column order so each series can be read without touching the others
+    np.save(outpt_file, np.asfortranarray(table))
+    with open(outpt_file[:-4] + ".json", "w") as output:
+        json.dump(header, output, indent=4)
+
+    return header
+
+
+def read_table(inpt_file):
+
+    """
+    Parses a text file into capacitor values, column names and a table of floats
+
+    Returns a tuple (capacitor values, column names, table)
+    """
+
+    capacitorValues = []
+    names = []
+    rows = []
+    headerCount = 0
+
+    with open(inpt_file, "r") as inpt:
+        dialect = csv.Sniffer().sniff(inpt.read(5000), delimiters=",\t;")
+        inpt.seek(0)
+
+        for line in csv.reader(inpt, dialect):
+            line = [x.strip() for x in line if x.strip() != ""]
+            if line == []:
+                continue
+
+            # Header rows start with text
+            if line[0][0].isalpha():
+                headerCount += 1
+                names = line
+                # Rows read since the first header were capacitor values
+                if headerCount == 2:
+                    capacitorValues = [[str(x) for x in row] for row in rows]
+                rows = []
+
+            else:
+                rows.append(line)
+
+    table = np.array(rows, dtype=np.float64)
+
+    # Column names only apply if they match the table
+    if len(names) != table.shape[1]:
+        names = []
+
+    return capacitorValues, names, table
+
+
+def load_series(inpt_file):
+
+    """
+    Opens a converted file without reading it into memory
+
+    Returns a tuple (header, table) where table is a read only memory mapped array
+    """
+
+    with open(inpt_file[:-4] + ".json", "r") as inpt:
+        header = json.load(inpt)
+
+    return header, np.load(inpt_file, mmap_mode="r")
+
+
+def time_slice(table, start=None, stop=None):
+
+    """
+    Selects the rows of a table with times between start and stop inclusive without copying them.
+    The time column must be sorted.
+    """
+
+    times = table[:, 0]
+    first = 0 if start is None else np.searchsorted(times, start, side="left")
+    last = len(times) if stop is None else np.searchsorted(times, stop, side="right")
+
+    return table[first:last]
+
+
+# Only runs program if its called as a script
+if __name__ == '__main__':
+    if len(argv) not in (3, 4):
+        print("Incorrect arguments.")
+        print("Run program using: python series_store.py [input file] [output file ending in .npy] [Optional number of layers]")
+
+    else:
+        convert(argv[1], argv[2], *[int(x) for x in argv[3:]])
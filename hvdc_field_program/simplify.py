@@ -0,0 +1,99 @@
+##############################################################
+#   Removes resistor breakpoints which barely change the     #
+#   piecewise linear resistance of each resistor             #
+##############################################################
+
+# Each resistor is simplified on its own using a top down split of its breakpoints.
+# Starting from a single segment covering the whole time range, the segment with the largest relative error is
+# split at its worst point until every segment is within tolerance or the segment limit is reached.
+
+import heapq
+import numpy as np
+
+
+def simplify_resistor_array(table, rel_tol=None, max_segments=None):
+
+    """
+    Simplifies the piecewise linear history of every resistor in a table
+
+    Args:
+        table - a 2D array where the first column is time and the rest are resistance values,
+                as returned by resistor_array()
+        rel_tol - largest relative resistance error allowed at any dropped breakpoint. Defaults to 0 which only
+                  removes breakpoints that lie exactly on a line
+        max_segments - largest number of line segments kept for each resistor
+
+    Returns a tuple (columns, removed):
+        columns - a list with a (times, values) tuple of arrays holding the breakpoints kept for each resistor
+        removed - the total number of line segments removed
+    """
+
+    if max_segments is not None and max_segments < 1:
+        raise ValueError("At least one segment must be kept for each resistor")
+
+    times = table[:, 0]
+    columns = []
+    removed = 0
+
+    for index in range(1, table.shape[1]):
+        keep = simplify_breakpoints(times, table[:, index], rel_tol, max_segments)
+        columns.append((times[keep], table[keep, index]))
+
+        removed += len(times) - len(keep)
+
+    return columns, removed
+
+
+def simplify_breakpoints(times, values, rel_tol=None, max_segments=None):
+
+    """
+    Chooses which breakpoints of a single piecewise linear function to keep
+
+    Args:
+        times, values - the breakpoints of the function
+        rel_tol - largest relative error allowed at any dropped breakpoint
+        max_segments - largest number of line segments kept
+
+    Returns a sorted array of the indices of the breakpoints to keep. The first and last are always kept
+    """
+
+    last = len(times) - 1
+    tolerance = 0.0 if rel_tol is None else rel_tol
+    limit = last if max_segments is None else max_segments
+
+    kept = [0, last]
+    # Heap of segments which could be split, largest error first
+    heap = []
+    _push_segment(heap, times, values, 0, last)
+
+    while heap and len(kept) - 1 < limit:
+        error, start, stop, worst = heapq.heappop(heap)
+
+        # Every other segment has a smaller error so nothing else needs splitting
+        if -error <= tolerance:
+            break
+
+        kept.append(worst)
+        _push_segment(heap, times, values, start, worst)
+        _push_segment(heap, times, values, worst, stop)
+
+    return np.sort(kept)
+
+
+def _push_segment(heap, times, values, start, stop):
+
+    """
+    Adds the segment between breakpoints start and stop to the heap along with its largest relative error.
+    Segments with no breakpoints inside them can't be split and are not added.
+    """
+
+    if stop - start < 2:
+        return
+
+    inner = slice(start + 1, stop)
+    # Value of the straight line between the end points at each breakpoint inside the segment
+    line = values[start] + (values[stop] - values[start]) * (times[inner] - times[start]) / (times[stop] - times[start])
+    error = np.abs(values[inner] - line) / np.maximum(np.abs(values[inner]), np.finfo(np.float64).tiny)
+
+    worst = int(np.argmax(error))
+    heapq.heappush(heap, (-error[worst], start, stop, start + 1 + worst))
@@ -0,0 +1,217 @@
+##############################################################
+#   Generates and optionally solves many variations of a     #
+#   model in parallel from a single set of inputs            #
+##############################################################
+
+# Each job takes the values from the setup file and replaces some of them with overrides e.g.
+#     {"time step": "1", "voltage": "const, 320k"}
+# When the input is an iteration config instead of a csv file the resistances are calculated for each job, so the
+# material settings of the config can be overridden as well e.g. {"gamma": "0.05", "radius data": "22,40,1.8"}
+# Overrides are given either as a list of these dictionaries or as a grid where every key has a list of values
+# and every combination is run.
+#
+# The input file is parsed once and handed to each worker process when it starts so workers never re-read it.
+# A manifest describing every job, its output files and how long it took is returned and optionally saved as JSON.
+# Giving a cache folder reuses the files of any job which has already been run with identical inputs.
+
+# Imports argv to get commandline arguments
+from sys import argv
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+import json
+import time
+from complex_generator import (read_arrays, setup, apply_setting, process_resistor_array, array_columns,
+                               write_schematic, write_netlist, text_waveform)
+from transient_solver import solve_transient, write_results
+from cache import ResultCache, hash_inputs
+from timestep import read_schedule, plan_steps
+from resistance import RESISTANCE_KEYS, read_config, read_inputs, apply_config, config_table, layer_radii
+
+
+# Inputs shared by every job in a worker process. Set once by _start_worker()
+_shared = {}
+
+
+def run_sweep(inpt_file, outpt_format, overrides, setup_file="config/generator_config.txt", solve=False,
+              workers=None, manifest_file=None, resistor_format="nested", cache_dir=None):
+
+    """
+    Runs one generation for each set of overrides across a pool of processes.
+
+    Args:
+        inpt_file - csv file of capacitor and resistor values, or an iteration config .txt file to calculate the
+                    resistances from. Read once for every job
+        outpt_format - name of the output files where {} is the number of the job. Ending in .asc gives
+                       schematics and .cir gives netlists
+        overrides - list of dictionaries of setup values or a dictionary of lists, see expand_overrides()
+        setup_file - setup file holding the values which are not overridden
+        solve - also runs the native solver for each job. Results are saved next to the output as .txt
+        workers - number of processes. Defaults to the number of processors
+        manifest_file - JSON file to save the manifest to
+        resistor_format - how the resistor functions are written, see resistor_expression()
+        cache_dir - folder of a ResultCache shared by every job. No cache is used if left out
+
+    Returns the manifest, a list with a dictionary for each job in the order they were given
+    """
+
+    if outpt_format[-4:] not in (".asc", ".cir"):
+        raise ValueError("Incorrect File types")
+
+    jobs = expand_overrides(overrides)
+
+    # Parses the shared inputs once in this process
+    setupValues = setup(setup_file)
+    schedule = read_schedule(setup_file)
+    if inpt_file[-4:] == ".txt":
+        config = read_config(inpt_file)
+        capacitorValues, temperatures, radii = read_inputs(config)
+        resistorValues = config_table(config, temperatures, radii)
+    else:
+        config, temperatures = None, None
+        capacitorValues, resistorValues = read_arrays(inpt_file)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_start_worker,
+                             initargs=(capacitorValues, resistorValues, setupValues, resistor_format,
+                                       cache_dir, schedule, config, temperatures)) as pool:
+
+        futures = [pool.submit(_run_job, index, job, outpt_format.format(index), solve)
+                   for index, job in enumerate(jobs)]
+        manifest = [future.result() for future in futures]
+
+    print("Sweep of {} jobs finished in {:.2f}s".format(len(jobs), time.perf_counter() - start))
+
+    if manifest_file is not None:
+        with open(manifest_file, "w") as output:
+            json.dump(manifest, output, indent=4)
+
+    return manifest
+
+
+def expand_overrides(overrides):
+
+    """
+    Converts the overrides into a list of jobs
+
+    Args:
+        overrides - either a list of dictionaries, one per job, or a dictionary mapping each setting to a list
+                    of values in which case every combination of values is a job
+
+    Returns a list of dictionaries of setting names against values
+    """
+
+    if isinstance(overrides, dict):
+        keys = list(overrides)
+        return [dict(zip(keys, values)) for values in product(*[overrides[key] for key in keys])]
+
+    return [dict(job) for job in overrides]
+
+
+def _start_worker(capacitorValues, resistorValues, setupValues, resistor_format, cache_dir, schedule, config,
+                  temperatures):
+
+    """
+    Stores the shared inputs in the worker and calculates the resistor line segments once for every job
+    """
+
+    _shared["capacitors"] = capacitorValues
+    _shared["resistors"] = resistorValues
+    _shared["cache"] = None if cache_dir is None else ResultCache(cache_dir)
+    _shared["segments"] = process_resistor_array(resistorValues)
+    _shared["columns"] = array_columns(*_shared["segments"])
+    _shared["setup"] = setupValues
+    _shared["format"] = resistor_format
+    _shared["schedule"] = schedule
+    _shared["config"] = config
+    _shared["temperatures"] = temperatures
+
+
+def _run_job(index, overrides, outpt_file, solve):
+
+    """
+    Generates, and solves if asked, a single job using the shared inputs
+
+    Returns the manifest entry for the job
+    """
+
+    start = time.perf_counter()
+
+    setupValues = list(_shared["setup"])
+    config = None
+    for key, value in overrides.items():
+        if key not in RESISTANCE_KEYS:
+            apply_setting(setupValues, key, str(value))
+            continue
+
+        if _shared["config"] is None:
+            raise ValueError("Sweeping {} needs an iteration config as the input".format(key))
+        if config is None:
+            config = dict(_shared["config"])
+        # Lists of values per section can be given as JSON lists
+        apply_config(config, key, ",".join(str(x) for x in value) if isinstance(value, list) else str(value))
+
+    resistorValues, segments, columns = _shared["resistors"], _shared["segments"], _shared["columns"]
+    if config is not None:
+        resistorValues = config_table(config, _shared["temperatures"], layer_radii(config["radius"]))
+        segments = process_resistor_array(resistorValues)
+        columns = array_columns(*segments)
+
+    # LTSpice can't read .npy waveforms so each output gets its own text copy, the solver still reads the original.
+    # The output names the copy so it is part of the key, see cached_generate_schematic() in cache.py
+    outputValues = text_waveform(setupValues, outpt_file)
+
+    cache = _shared["cache"]
+    key = None
+    if cache is not None:
+        key = hash_inputs(_shared["capacitors"], resistorValues, outputValues, "generate", _shared["format"],
+                          None, None)
+
+    entry = {"job": index, "overrides": overrides, "output": outpt_file, "results": None,
+             "generate cached": cache is not None and cache.fetch(key, outpt_file), "solve cached": False,
+             "generate seconds": None, "solve seconds": None}
+
+    if not entry["generate cached"]:
+        if outpt_file[-4:] == ".cir":
+            write_netlist(outpt_file, columns, _shared["capacitors"], outputValues, _shared["format"])
+        else:
+            write_schematic(outpt_file, columns, _shared["capacitors"], outputValues, _shared["format"])
+
+        if cache is not None:
+            cache.store(key, outpt_file)
+    entry["generate seconds"] = time.perf_counter() - start
+
+    if solve:
+        start = time.perf_counter()
+        entry["results"] = outpt_file[:-4] + ".txt"
+
+        if cache is not None:
+            key = hash_inputs(_shared["capacitors"], resistorValues, setupValues, "simulate", _shared["schedule"])
+            entry["solve cached"] = cache.fetch(key, entry["results"])
+
+        if not entry["solve cached"]:
+            v_string, parasiticResistance, timeStart, timeStop, timeStep, _ = setupValues
+            # Planned for each job as the overrides can change the time step and voltage
+            grid, _ = plan_steps(setupValues, _shared["schedule"], segments[0])
+            times, voltages = solve_transient(_shared["capacitors"], segments, v_string,
+                                              parasiticResistance, timeStop, timeStep, timeStart, grid=grid)
+            write_results(entry["results"], times, voltages)
+
+            if cache is not None:
+                cache.store(key, entry["results"])
+        entry["solve seconds"] = time.perf_counter() - start
+
+    return entry
+
+
+# Only runs program if its called as a script
+if __name__ == '__main__':
+    # Checks for correct number of commandline arguments and prompts user if they arent given
+    if len(argv) not in (4, 5) or argv[3][-5:] != ".json":
+        print("Incorrect arguments.")
+        print("Run program using: python sweep.py [input file or iteration config] [output file format with {}] [overrides json file] [Optional Setup file]")
+
+    else:
+        with open(argv[3], "r") as inpt:
+            overrides = json.load(inpt)
+
+        run_sweep(argv[1], argv[2], overrides, *argv[4:], manifest_file=argv[2].replace("{}", "manifest")[:-4] + ".json")
@@ -0,0 +1,49 @@
+##############################################################
+#   Runs SimulationRunner with FakeBackend so retries and    #
+#   timeouts can be checked without a simulator              #
+##############################################################
+
+from runner import SimulationRunner, FakeBackend
+
+
+def test_runs_every_job(tmp_path):
+    backend = FakeBackend()
+    jobs = [(str(tmp_path / "{}.cir".format(x)), str(tmp_path / "{}.txt".format(x))) for x in range(4)]
+
+    with SimulationRunner(backend, max_workers=2) as runner:
+        results = runner.run_all(jobs)
+
+    assert [(x["input"], x["output"]) for x in results] == jobs
+    assert all(x["error"] is None and x["attempts"] == 1 for x in results)
+    assert all(open(output).read() == "time\tV(n001)\n0\t0\n" for _, output in jobs)
+
+
+def test_retries_failed_job(tmp_path):
+    canned = tmp_path / "canned.txt"
+    canned.write_text("time\tV(n001)\n0\t1\n")
+    backend = FakeBackend(str(canned), failures=2)
+
+    with SimulationRunner(backend, max_workers=1, retries=2) as runner:
+        result = runner.run_all([("a.cir", str(tmp_path / "a.txt"))])[0]
+
+    assert result["error"] is None
+    assert result["attempts"] == 3
+    assert (tmp_path / "a.txt").read_text() == canned.read_text()
+
+
+def test_reports_error_when_retries_run_out(tmp_path):
+    with SimulationRunner(FakeBackend(failures=5), max_workers=1, retries=1) as runner:
+        result = runner.run_all([("a.cir", str(tmp_path / "a.txt"))])[0]
+
+    assert result["attempts"] == 2
+    assert result["error"] == "Exit code 1: Simulated failure"
+    assert not (tmp_path / "a.txt").exists()
+
+
+def test_times_out(tmp_path):
+    with SimulationRunner(FakeBackend(delay=5), max_workers=1, timeout=0.05, retries=1) as runner:
+        result = runner.run_all([("a.cir", str(tmp_path / "a.txt"))])[0]
+
+    assert result["attempts"] == 2
+    assert result["error"] == "Timed out after 0.05s"
+    assert result["seconds"] < 1
@@ -0,0 +1,164 @@
+##############################################################
+#   Plans the time steps of a simulation from the times      #
+#   where the voltage or resistances change                  #
+##############################################################
+
+# A fixed time step has to be small enough for the fastest change in the whole run even though the source and
+# resistances only change at a handful of breakpoints. A graded schedule restarts at the time step after every
+# breakpoint and grows it geometrically up to a maximum until the next breakpoint, which is always hit exactly.
+#
+# The schedule is only used by the native solver, in transient_solver.py, iteration.py, sweep.py and cache.py.
+# Schematics and netlists keep the time step as given as LTSpice does not see the resistance changes as breakpoints.
+#
+# Optional settings read from the generator setup file:
+#     time step schedule - fixed (default) or graded
+#     maximum time step - largest step of a graded schedule. Defaults to a fiftieth of the run
+#     step growth - factor each step grows by. Defaults to 2
+
+# Imports argv to get commandline arguments
+from sys import argv
+import numpy as np
+from complex_generator import read_arrays, setup
+from transient_solver import parse_value, parse_voltage
+
+
+def read_schedule(file):
+
+    """
+    Extracts the time step schedule settings from the setup file
+
+    Returns a dictionary of the settings, values not in the file are left at their defaults
+    """
+
+    schedule = {"schedule": "fixed", "maxStep": "", "growth": 2.0}
+
+    with open(file, "r") as inpt:
+        for line in inpt:
+            line = [x.strip() for x in line.split('=')]
+
+            if line[0] == "time step schedule":
+                schedule["schedule"] = line[1].lower()
+            elif line[0] == "maximum time step":
+                schedule["maxStep"] = line[1]
+            elif line[0] == "step growth":
+                schedule["growth"] = float(line[1])
+
+    if schedule["schedule"] not in ("fixed", "graded"):
+        raise ValueError("Unknown time step schedule: " + schedule["schedule"])
+
+    return schedule
+
+
+def breakpoints(v_string, resistorTimes, timeStop):
+
+    """
+    Combines the times where the source and resistances change
+
+    Args:
+        v_string - voltage source definition as returned by setup()
+        resistorTimes - times of the resistor table
+        timeStop - end of the simulation
+
+    Returns a sorted array of the breakpoints between 0 and timeStop inclusive
+    """
+
+    times = np.concatenate(([0.0, timeStop], parse_voltage(v_string)[0], np.asarray(resistorTimes, dtype=np.float64)))
+
+    return np.unique(times[(times >= 0) & (times <= timeStop)])
+
+
+def step_schedule(points, minStep, maxStep, growth=2.0):
+
+    """
+    Creates a graded list of times through a set of breakpoints.
+    After each breakpoint the step starts at minStep and is multiplied by growth until it reaches maxStep.
+    Breakpoints closer together than minStep are stepped between directly.
+
+    Args:
+        points - sorted breakpoints, the first and last being the start and end of the simulation
+        minStep, maxStep - smallest and largest steps
+        growth - factor each step grows by
+
+    Returns a sorted array of times including every breakpoint
+    """
+
+    if growth <= 1 or maxStep <= minStep:
+        steps = np.array([minStep])
+    else:
+        # Steps while growing, the last of which reaches the maximum
+        count = int(np.ceil(np.log(maxStep / minStep) / np.log(growth)))
+        steps = np.minimum(minStep * growth ** np.arange(count + 1), maxStep)
+    offsets = np.cumsum(steps)
+
+    grid = [points[:1]]
+    for start, stop in zip(points[:-1], points[1:]):
+        length = stop - start
+
+        # Grows through the steps then continues at the maximum
+        if length > offsets[-1]:
+            extra = int((length - offsets[-1]) / steps[-1])
+            inner = np.concatenate((offsets, offsets[-1] + steps[-1] * np.arange(1, extra + 1)))
+        else:
+            inner = offsets
+        inner = inner[inner < length]
+
+        # Drops a point which would leave a very small final step before the breakpoint
+        if len(inner) and length - inner[-1] < 0.5 * minStep:
+            inner = inner[:-1]
+
+        grid.extend([start + inner, [stop]])
+
+    return np.concatenate(grid)
+
+
+def plan_steps(setupValues, schedule, resistorTimes):
+
+    """
+    Creates the time points for a simulation from the setup values
+
+    Args:
+        setupValues - list of values as returned by setup()
+        schedule - settings as returned by read_schedule()
+        resistorTimes - times of the resistor table
+
+    Returns a tuple (grid, maximum step) where grid is None for a fixed schedule
+    """
+
+    v_string, _, _, timeStop, timeStep, _ = setupValues
+    timeStop, timeStep = parse_value(timeStop), parse_value(timeStep)
+
+    if schedule["schedule"] == "fixed":
+        return None, timeStep
+
+    maxStep = parse_value(schedule["maxStep"]) if schedule["maxStep"] != "" else timeStop / 50
+    grid = step_schedule(breakpoints(v_string, resistorTimes, timeStop), timeStep, max(maxStep, timeStep),
+                         schedule["growth"])
+
+    return grid, max(maxStep, timeStep)
+
+
+def step_report(grid, setupValues):
+
+    """
+    Describes the number of steps in a schedule compared to a fixed step
+    """
+
+    fixed = int(np.ceil(parse_value(setupValues[3]) / parse_value(setupValues[4])))
+    if grid is None:
+        return "Fixed time step: {} steps".format(fixed)
+
+    return "Graded time step: {} steps instead of {} with a fixed step".format(len(grid) - 1, fixed)
+
+
+# Only runs program if its called as a script
+if __name__ == '__main__':
+    if len(argv) not in (2, 3):
+        print("Incorrect arguments.")
+        print("Run program using: python timestep.py [input file] [Optional setup file]")
+
+    else:
+        setup_file = argv[2] if len(argv) == 3 else "config/generator_config.txt"
+        setupValues = setup(setup_file)
+        schedule = read_schedule(setup_file)
+        schedule["schedule"] = "graded"
+        print(step_report(plan_steps(setupValues, schedule, read_arrays(argv[1])[1][:, 0])[0], setupValues))
@@ -0,0 +1,414 @@
+##############################################################
+#   Solves the complex model directly without LTSpice        #
+#   using the same input and setup files as the generator    #
+##############################################################
+
+# The model is a stack of layers in series between the voltage source and ground.
+# Each layer holds one resistor and one capacitor per section:
+#     Section 1 - resistor and capacitor in parallel across the layer (conduction and geometric capacitance)
+#     Section 2+ - resistor and capacitor in series across the layer (polarisation branches)
+#
+# Node voltages are integrated with the backward Euler method. The internal node of each series branch is
+# eliminated analytically which leaves a tridiagonal (banded) conductance matrix over the layer boundaries.
+#
+# The program outputs a tab separated table of time against node voltage in the same layout LTSpice exports.
+
+# Imports argv to get commandline arguments
+from sys import argv
+import numpy as np
+from complex_generator import read_arrays, setup, process_resistor_array, segment_arrays
+
+
+# Multipliers for the SPICE number suffixes. Longer suffixes must be checked first
+SUFFIXES = (("meg", 1e6), ("mil", 25.4e-6), ("t", 1e12), ("g", 1e9), ("k", 1e3),
+            ("m", 1e-3), ("u", 1e-6), ("n", 1e-9), ("p", 1e-12), ("f", 1e-15))
+
+
+def simulate(inpt_file, outpt_file, setup_file="config/generator_config.txt"):
+    if inpt_file[-4:] not in (".csv", ".npy") or outpt_file[-4:] != ".txt" or setup_file[-4:] != ".txt":
+        raise ValueError("Incorrect File types")
+    main(inpt_file, outpt_file, setup_file)
+
+    return 0
+
+
+def main(inpt_file, outpt_file, setup_file):
+
+    """
+    Structures the flow of the program.
+    Reads in data from the input file, solves the circuit and writes the node voltages to the output file.
+    Notably will automatically overwrite the output file.
+    """
+
+    # Reads in values from configuration file. Compression only applies to LTSpice
+    setupValues = setup(setup_file)
+    v_string, parasiticResistance, timeStart, timeStop, timeStep, compression = setupValues
+
+    # Reads and organises data from the input file
+    capacitorValues, resistorValues = read_arrays(inpt_file)
+    # Calculates equations of straight lines between resistor values in time
+    resistorValues = process_resistor_array(resistorValues)
+
+    # Imported here as timestep.py uses this file. Steps through a graded schedule if the setup file asks for one
+    from timestep import read_schedule, plan_steps, step_report
+    grid, maxStep = plan_steps(setupValues, read_schedule(setup_file), resistorValues[0])
+    if grid is not None:
+        print(step_report(grid, setupValues))
+
+    times, voltages = solve_transient(capacitorValues, resistorValues, v_string, parasiticResistance,
+                                      timeStop, timeStep, timeStart, grid=grid)
+
+    write_results(outpt_file, times, voltages)
+
+
+def parse_value(value):
+
+    """
+    Converts a number written in SPICE notation into a float e.g. 400k -> 400000.0
+
+    Args:
+        value - string or number. Units after the suffix are ignored as they are in LTSpice
+
+    Returns the value as a float
+    """
+
+    value = str(value).strip().lower()
+
+    # Empty values are treated as zero in the same way LTSpice treats missing values
+    if value == "":
+        return 0.0
+
+    # Finds where the numeric part of the string ends
+    end = len(value)
+    for index, char in enumerate(value):
+        if char.isalpha() and char != "e":
+            end = index
+            break
+        # Catches exponent markers that are not followed by a number
+        if char == "e" and not (value[index + 1:index + 2].isdigit() or value[index + 1:index + 2] in ("-", "+")):
+            end = index
+            break
+
+    number = float(value[:end])
+
+    for suffix, multiplier in SUFFIXES:
+        if value[end:].startswith(suffix):
+            return number * multiplier
+
+    return number
+
+
+def parse_voltage(v_string):
+
+    """
+    Converts the voltage string produced by setup() into time voltage breakpoints
+
+    Args:
+        v_string - either a constant value, PWL( t1 v1 t2 v2 ... ) or PWL file=path
+
+    Returns a tuple of two arrays (times, voltages)
+    """
+
+    v_string = v_string.strip()
+
+    if waveform_file(v_string) is not None:
+        return read_waveform(waveform_file(v_string))
+
+    if v_string.upper().startswith("PWL"):
+        points = [parse_value(x) for x in v_string[v_string.index("(") + 1:v_string.rindex(")")].split()]
+        return np.array(points[0::2]), np.array(points[1::2])
+
+    return np.array([0.0]), np.array([parse_value(v_string)])
+
+
+def waveform_file(v_string):
+
+    """
+    Returns the path of the waveform file of a PWL file=path source, or None for any other source
+    """
+
+    v_string = v_string.strip()
+
+    if v_string.upper().startswith("PWL") and v_string[3:].strip().lower().startswith("file="):
+        return v_string[3:].strip()[5:].strip('"')
+
+    return None
+
+
+def read_waveform(file):
+
+    """
+    Reads a voltage waveform file of time voltage pairs.
+    Text files are read the way LTSpice reads them, one pair per line separated by commas or spaces.
+    A .npy file holding a two column array is memory mapped so large waveforms are not copied until used.
+
+    Returns a tuple of two arrays (times, voltages)
+    """
+
+    if file[-4:] == ".npy":
+        table = np.load(file, mmap_mode="r")
+
+    else:
+        with open(file, "r") as inpt:
+            values = inpt.read().replace(",", " ").split()
+
+        # Plain numbers convert in one go, values with SPICE suffixes such as 400k are parsed one at a time
+        try:
+            table = np.array(values, dtype=np.float64)
+        except ValueError:
+            table = np.array([parse_value(x) for x in values])
+
+    table = table.reshape(-1, 2)
+
+    return table[:, 0], table[:, 1]
+
+
+def resistances_at(time, times, slopes, intercepts):
+
+    """
+    Evaluates every resistor at a single point in time using the same rules as the LTSpice if statements.
+    Each segment applies up to its end time and the final value is held afterwards.
+
+    Returns an array with one value per resistor
+    """
+
+    index = np.searchsorted(times, time, side="right")
+
+    if index == len(times):
+        return slopes[-1] * times[-1] + intercepts[-1]
+
+    return slopes[index] * time + intercepts[index]
+
+
+def solve_tridiagonal(lower, diag, upper, rhs):
+
+    """
+    Solves a tridiagonal system using the Thomas algorithm.
+    The conductance matrix is diagonally dominant so no pivoting is required.
+
+    Args:
+        lower - sub diagonal, lower[0] is unused
+        diag - main diagonal
+        upper - super diagonal, upper[-1] is unused
+        rhs - right hand side
+
+    Returns the solution as an array
+    """
+
+    size = len(diag)
+    c = np.empty(size)
+    d = np.empty(size)
+
+    c[0] = upper[0] / diag[0]
+    d[0] = rhs[0] / diag[0]
+    for i in range(1, size):
+        denom = diag[i] - lower[i] * c[i - 1]
+        c[i] = upper[i] / denom
+        d[i] = (rhs[i] - lower[i] * d[i - 1]) / denom
+
+    for i in range(size - 2, -1, -1):
+        d[i] -= c[i] * d[i + 1]
+
+    return d
+
+
+def time_grid(timeStop, timeStep, breakpoints, previous=None):
+
+    """
+    Creates the time points the solver steps through.
+    Steps are no larger than the maximum time step and every source breakpoint is hit exactly.
+    Giving previous reuses the time points of an earlier run instead, e.g. the times saved by this solver or
+    the accepted steps of an LTSpice run read with raw_reader.py. Breakpoints are still added.
+
+    Returns a sorted array of times starting at 0
+    """
+
+    if previous is None:
+        grid = np.arange(0.0, timeStop, timeStep)
+    else:
+        previous = np.asarray(previous, dtype=np.float64)
+        grid = np.concatenate(([0.0], previous[(previous > 0) & (previous < timeStop)]))
+    grid = np.concatenate((grid, breakpoints[(breakpoints > 0) & (breakpoints < timeStop)], [timeStop]))
+
+    return np.unique(grid)
+
+
+def solve_transient(capacitorValues, resistorValues, v_string, parasiticResistance, timeStop, timeStep,
+                    timeStart="0", initial=None, grid=None, keep_state=False, state_time=None):
+
+    """
+    Integrates the node voltages of the complex model through time.
+
+    Args:
+        capacitorValues - table of capacitor values as returned by read_data(), one row per layer
+        resistorValues - resistor line segments as returned by process_resistor_array(). The table returned by
+                         process_resistorValues() is also accepted
+        v_string - voltage source definition as returned by setup()
+        parasiticResistance - resistance in series with the voltage source
+        timeStop - time to stop the simulation
+        timeStep - the maximum time step
+        timeStart - time to start saving data
+        initial - either node voltages at time 0, one per layer boundary, or the state of an earlier run as
+                  returned with keep_state. Node voltages charge the capacitors in the series branches to the
+                  voltage across their layer, the same operating point LTSpice finds from initial_conditions() in
+                  complex_generator.py. A state starts the run at the time it was taken instead of at 0.
+                  Defaults to every node starting at 0V
+        grid - time points to step through instead of the regular grid, see time_grid()
+        keep_state - also return the state at the state time, which can start another run from there
+        state_time - time to take the state at with keep_state, the first time point at or after it is used.
+                     Defaults to the time start
+
+    Returns a tuple (times, voltages) where voltages has one column per layer boundary from the
+    top of the stack down. The bottom of the stack is ground and is not included.
+    With keep_state the tuple is (times, voltages, state)
+    """
+
+    # Capacitances as a layers x sections array
+    caps = np.array([[parse_value(x) for x in row] for row in capacitorValues])
+    layers, sections = caps.shape
+
+    if not isinstance(resistorValues, tuple):
+        resistorValues = segment_arrays(resistorValues)
+    times, slopes, intercepts = resistorValues
+    if slopes.shape[1] != layers * sections:
+        raise ValueError("Number of resistors does not match the number of capacitors")
+
+    vTimes, vValues = parse_voltage(v_string)
+    rSeries = parse_value(parasiticResistance)
+    timeStop, timeStep, timeStart = parse_value(timeStop), parse_value(timeStep), parse_value(timeStart)
+    state_time = timeStart if state_time is None else parse_value(state_time)
+
+    grid = time_grid(timeStop, timeStep, vTimes, grid)
+
+    # Voltage across each layer and across the capacitor in each series branch
+    if isinstance(initial, dict):
+        nodes = np.array(initial["nodes"], dtype=np.float64)
+        branch = np.array(initial["branch"], dtype=np.float64)
+        grid = np.concatenate(([initial["time"]], grid[grid > initial["time"]]))
+    else:
+        nodes = np.zeros(layers) if initial is None else np.asarray(initial, dtype=np.float64)
+        if nodes.shape != (layers,):
+            raise ValueError("Number of initial voltages does not match the number of layers")
+        # No current flows in the series branches at the operating point
+        branch = np.repeat((nodes - np.append(nodes[1:], 0.0))[:, None], sections - 1, axis=1)
+    if nodes.shape != (layers,) or branch.shape != (layers, sections - 1):
+        raise ValueError("Number of initial voltages does not match the number of layers")
+    drop = nodes - np.append(nodes[1:], 0.0)
+
+    # Tridiagonal matrix storage. Node k is the top of layer k
+    lower = np.zeros(layers)
+    upper = np.zeros(layers)
+
+    saved = grid[grid >= timeStart]
+    voltages = np.zeros((len(saved), layers))
+    state = None
+    row = 0
+
+    if grid[0] >= state_time:
+        state = {"time": grid[0], "nodes": nodes.copy(), "branch": branch.copy()}
+    if grid[0] >= timeStart:
+        voltages[0] = nodes
+        row = 1
+
+    for n in range(1, len(grid)):
+        t = grid[n]
+        h = t - grid[n - 1]
+
+        # Resistors are stored section by section so reshaping gives a sections x layers array
+        g = 1 / resistances_at(t, times, slopes, intercepts).reshape(sections, layers).T
+        k = caps / h
+
+        # Each series branch is equivalent to a conductance in parallel with a current source
+        gEq = g[:, 1:] * k[:, 1:] / (g[:, 1:] + k[:, 1:])
+        conductance = g[:, 0] + k[:, 0] + gEq.sum(axis=1)
+        source = k[:, 0] * drop + (gEq * branch).sum(axis=1)
+
+        # Assembles the nodal equations. Layer k connects node k to node k + 1 (ground for the last layer)
+        diag = conductance.copy()
+        diag[1:] += conductance[:-1]
+        lower[1:] = -conductance[:-1]
+        upper[:-1] = -conductance[:-1]
+        rhs = source.copy()
+        rhs[1:] -= source[:-1]
+
+        vSource = np.interp(t, vTimes, vValues)
+        if rSeries > 0:
+            diag[0] += 1 / rSeries
+            rhs[0] += vSource / rSeries
+        else:
+            diag[0], upper[0], rhs[0] = 1.0, 0.0, vSource
+
+        nodes = solve_tridiagonal(lower, diag, upper, rhs)
+
+        # Updates the stored capacitor voltages for the next step
+        newDrop = nodes - np.append(nodes[1:], 0.0)
+        branch = (g[:, 1:] * newDrop[:, None] + k[:, 1:] * branch) / (g[:, 1:] + k[:, 1:])
+        drop = newDrop
+
+        if state is None and t >= state_time:
+            state = {"time": t, "nodes": nodes.copy(), "branch": branch.copy()}
+        if t >= timeStart:
+            voltages[row] = nodes
+            row += 1
+
+    if keep_state:
+        return saved, voltages, state
+
+    return saved, voltages
+
+
+def initial_state(times, voltages, time=None):
+
+    """
+    Takes the node voltages of an earlier solution at a single time, e.g. to write as initial conditions with
+    initial_conditions() in complex_generator.py. Voltages are interpolated between saved points.
+    The voltages of the series branch capacitors are not saved, use keep_state in solve_transient() to start
+    the native solver from the full state.
+
+    Args:
+        times, voltages - solution as returned by solve_transient()
+        time - time to take the voltages at. Defaults to the end of the solution
+
+    Returns an array with one voltage per layer boundary
+    """
+
+    time = times[-1] if time is None else time
+
+    return np.array([np.interp(time, times, voltages[:, x]) for x in range(voltages.shape[1])])
+
+
+def write_results(outpt_file, times, voltages):
+
+    """
+    Writes the solution as a tab separated table of time against node voltage.
+    Nodes are named in the same way as LTSpice names them, n001 being the top of the stack.
+    """
+
+    header = "\t".join(["time"] + ["V(n{:03d})".format(x + 1) for x in range(voltages.shape[1])])
+    np.savetxt(outpt_file, np.column_stack((times, voltages)), fmt="%.9e", delimiter="\t",
+               header=header, comments="")
+
+
+# Only runs program if its called as a script
+if __name__ == '__main__':
+    flag = True
+    # Checks for correct number of commandline arguments and prompts user if they arent given
+    if len(argv) != 4:
+        if len(argv) == 3:
+            argv.append("config/generator_config.txt")
+
+        else:
+            flag = False
+            print("Incorrect arguments.")
+            print("Run program using: python transient_solver.py [input file name as one word] [output file name as one word] [Optional Setup file name as one word]")
+
+    # Checks for the arguments having the correct file extensions
+    if flag and (argv[1][-4:] not in (".csv", ".npy") or argv[2][-4:] != ".txt" or argv[3][-4:] != ".txt"):
+        flag = False
+        print("Incorrect arguments. \nPlease make sure the specified files have the correct file extension\n\te.g. python transient_solver.py input.csv output.txt setup.txt")
+
+    # Runs program only if tests have passed
+    if flag:
+        main(*argv[1:4])
+
+    else: print(argv)